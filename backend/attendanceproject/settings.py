@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -86,6 +87,49 @@ DATABASES = {
     }
 }
 
+# Production SQLite (set SQLITE_PRODUCTION=1): WAL so readers never block the
+# scan writer, a busy timeout instead of immediate "database is locked",
+# write transactions that take the lock up front, persistent connections,
+# and a read-only 'reports' connection for report and dashboard reads.
+if os.environ.get('SQLITE_PRODUCTION') == '1':
+    SQLITE_PRAGMAS = (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=268435456;'
+        'PRAGMA cache_size=-65536;'
+    )
+    DATABASES['default'].update({
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS,
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+    DATABASES['reports'] = {
+        **DATABASES['default'],
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS + 'PRAGMA query_only=ON;',
+            'timeout': 20,
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['students.routers.ReportRouter']
+
+
+# Cache shared by every worker on this host: roster generations, attendance
+# versions and the scanner/user lookups only invalidate across processes
+# through it. Use Redis or Memcached once workers span several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        # culled version keys only cost a rebuild, but keep them around
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -125,7 +169,7 @@ STATIC_URL = 'static/'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'students.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -140,6 +184,61 @@ REST_FRAMEWORK = {
 }
 
 
+# Fingerprint matching backend. HashMatcher needs byte-identical captures;
+# switch to VectorMatcher for real readers, e.g.
+# {'BACKEND': 'students.matching.VectorMatcher',
+#  'OPTIONS': {'metric': 'cosine', 'threshold': 0.9, 'dimensions': 128}}
+FINGERPRINT_MATCHER = {
+    'BACKEND': 'students.matching.HashMatcher',
+}
+
+# Seconds a scanner API key lookup stays cached. Admin edits
+# invalidate the shared cache immediately; this bounds how long any other
+# process can keep accepting a deactivated scanner.
+SCANNER_CACHE_TIMEOUT = 30
+
+# Seconds the id/username/role/active flag behind a JWT stay cached. Saving
+# or deleting a user clears it at once; this bounds queryset updates.
+AUTH_USER_CACHE_TIMEOUT = 30
+
+# Active class sessions older than this many seconds are closed by
+# `manage.py close_sessions --stale`.
+CLASS_SESSION_MAX_DURATION = 4 * 60 * 60
+
+# Scans read active sessions from a per-process registry. Other workers'
+# changes reach it through generations kept in CACHES; entries are also
+# rebuilt after this many seconds (a few seconds when CACHES is per-process).
+ROSTER_MAX_AGE = 300
+
+# Write-behind scan ingestion: when enabled, scan appends accepted events to
+# the journal and returns 202; `manage.py drain_journal --interval 1` writes
+# them to the database in batches.
+ATTENDANCE_WRITE_BEHIND = False
+ATTENDANCE_JOURNAL_PATH = BASE_DIR / 'journal' / 'scans.ndjson'
+
+# Scan audit rows (AttendanceLog) are buffered per process and bulk inserted
+# once this many are waiting or every FLUSH_INTERVAL seconds.
+ATTENDANCE_LOG_BATCH_SIZE = 200
+ATTENDANCE_LOG_FLUSH_INTERVAL = 2
+
+# `manage.py archive_attendance` moves old closed sessions into gzip'd NDJSON
+# files under ATTENDANCE_ARCHIVE_DIR/<term>/. A term is named after the
+# YYYY-MM it starts in; terms start in these months.
+ATTENDANCE_ARCHIVE_DIR = BASE_DIR / 'archive'
+ATTENDANCE_TERM_START_MONTHS = [1, 7]
+
+# Seconds an idle live session feed (sessions/<id>/live/) waits before it
+# re-reads the session counters and sends a keepalive.
+LIVE_FEED_KEEPALIVE = 15
+
+# Dashboard responses are cached per process (LRU, DASHBOARD_CACHE_SIZE
+# entries) under an ETag built from attendance versions kept in CACHES.
+# Tags also roll over every DASHBOARD_CACHE_TTL seconds (None to disable),
+# which bounds staleness if CACHES is ever made per-process.
+DASHBOARD_CACHE_SIZE = 512
+DASHBOARD_CACHE_TTL = 60
+
+
 STATIC_URL = '/static/'
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -39,6 +39,7 @@ class ScannerDeviceAdmin(admin.ModelAdmin):
 # AttendanceLog admin
 @admin.register(AttendanceLog)
 class AttendanceLogAdmin(admin.ModelAdmin):
-    list_display = ('student', 'scanner', 'timestamp')
-    list_filter = ('scanner', 'timestamp')
+    list_display = ('timestamp', 'scanner', 'student', 'class_session', 'outcome', 'latency_ms')
+    list_filter = ('outcome', 'scanner', 'timestamp')
+    list_select_related = ('student', 'scanner', 'class_session__course')
     search_fields = ('student__username', 'scanner__name')
@@ -0,0 +1,186 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Attendance, AttendanceLog, ClassSession
+from .versions import bump_courses
+
+SESSION_FIELDS = [
+    'id', 'course_id', 'course__name', 'start_time', 'end_time',
+    'present_count', 'absent_count', 'late_count', 'excused_count', 'enrolled_count',
+]
+ATTENDANCE_FIELDS = [
+    'id', 'student_id', 'student__username', 'class_session_id',
+    'class_session__course_id', 'class_session__course__name',
+    'class_session__start_time', 'class_session__end_time', 'status', 'timestamp',
+]
+LOG_FIELDS = [
+    'id', 'student_id', 'scanner_id', 'class_session_id', 'outcome', 'latency_ms', 'timestamp',
+]
+DATETIME_FIELDS = {'class_session__start_time', 'class_session__end_time', 'timestamp'}
+
+
+def archive_root():
+    return str(getattr(settings, 'ATTENDANCE_ARCHIVE_DIR', settings.BASE_DIR / 'archive'))
+
+
+def term_for(value):
+    """Label of the term containing ``value``: the YYYY-MM its term starts in."""
+    months = sorted(getattr(settings, 'ATTENDANCE_TERM_START_MONTHS', [1, 7]))
+    local = timezone.localtime(value)
+    year = local.year
+    starts = [month for month in months if month <= local.month]
+    if not starts:
+        # before the first term start of the year: still in last year's final term
+        return f"{year - 1}-{months[-1]:02d}"
+    return f"{year}-{starts[-1]:02d}"
+
+
+def available_terms():
+    root = archive_root()
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        (name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))),
+        reverse=True
+    )
+
+
+def _record(fields, row):
+    return {
+        field: value.isoformat() if hasattr(value, 'isoformat') else value
+        for field, value in zip(fields, row)
+    }
+
+
+class TermArchive:
+    """
+    Gzip'd NDJSON files for one term: sessions, attendance and logs.
+
+    Each archiving pass appends one gzip member per file, so a term can be
+    extended by later runs and still reads back as a single stream.
+    """
+
+    KINDS = ('sessions', 'attendance', 'logs')
+
+    def __init__(self, term):
+        self.term = term
+        self.path = os.path.join(archive_root(), term)
+
+    def file(self, kind):
+        return os.path.join(self.path, f'{kind}.ndjson.gz')
+
+    def append(self, kind, records):
+        if not records:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.file(kind), 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as handle:
+                for record in records:
+                    handle.write((json.dumps(record) + '\n').encode())
+            raw.flush()
+            # the rows are deleted right after this returns
+            os.fsync(raw.fileno())
+
+    def read(self, kind):
+        if not os.path.exists(self.file(kind)):
+            return
+        # a crash between writing and deleting re-archives a chunk; skip repeats
+        seen = set()
+        with gzip.open(self.file(kind), 'rt') as handle:
+            for line in handle:
+                record = json.loads(line)
+                if record['id'] in seen:
+                    continue
+                seen.add(record['id'])
+                yield record
+
+
+def archive_sessions(sessions, batch_size=500):
+    """
+    Move closed sessions, their attendance and their audit logs into term
+    archives, deleting each chunk from the database once it is on disk.
+    Returns {term: {"sessions": n, "attendance": n, "logs": n}}.
+    """
+    summary = {}
+    session_ids = list(
+        sessions.filter(is_active=False).order_by('start_time').values_list('id', flat=True)
+    )
+    for start in range(0, len(session_ids), batch_size):
+        chunk = session_ids[start:start + batch_size]
+        by_term = defaultdict(lambda: {kind: [] for kind in TermArchive.KINDS})
+        terms = {}
+        courses = set()
+        for *row, lecturer_id in ClassSession.objects.filter(id__in=chunk).values_list(
+            *SESSION_FIELDS, 'course__lecturer_id'
+        ):
+            courses.add((row[1], lecturer_id))
+            terms[row[0]] = term_for(row[3])
+            by_term[terms[row[0]]]['sessions'].append(_record(SESSION_FIELDS, row))
+        attendance = Attendance.objects.filter(
+            class_session_id__in=chunk
+        ).order_by('-timestamp', '-id').values_list(*ATTENDANCE_FIELDS).iterator(chunk_size=2000)
+        for row in attendance:
+            by_term[terms[row[3]]]['attendance'].append(_record(ATTENDANCE_FIELDS, row))
+        logs = AttendanceLog.objects.filter(
+            class_session_id__in=chunk
+        ).order_by('timestamp', 'id').values_list(*LOG_FIELDS).iterator(chunk_size=2000)
+        for row in logs:
+            by_term[terms[row[3]]]['logs'].append(_record(LOG_FIELDS, row))
+
+        for term, records in by_term.items():
+            archive = TermArchive(term)
+            counts = summary.setdefault(term, {kind: 0 for kind in TermArchive.KINDS})
+            for kind in TermArchive.KINDS:
+                archive.append(kind, records[kind])
+                counts[kind] += len(records[kind])
+
+        with transaction.atomic():
+            # children first so the session delete has nothing left to cascade
+            AttendanceLog.objects.filter(class_session_id__in=chunk).delete()
+            Attendance.objects.filter(class_session_id__in=chunk).delete()
+            ClassSession.objects.filter(id__in=chunk).delete()
+        bump_courses(courses)
+    return summary
+
+
+def archive_orphan_logs(before, batch_size=5000):
+    """Archive audit rows with no session (rejected scans) older than ``before``."""
+    summary = {}
+    logs = AttendanceLog.objects.filter(class_session__isnull=True, timestamp__lt=before)
+    while True:
+        rows = list(logs.order_by('id').values_list(*LOG_FIELDS)[:batch_size])
+        if not rows:
+            return summary
+        by_term = {}
+        for row in rows:
+            by_term.setdefault(term_for(row[6]), []).append(_record(LOG_FIELDS, row))
+        for term, records in by_term.items():
+            TermArchive(term).append('logs', records)
+            summary[term] = summary.get(term, 0) + len(records)
+        AttendanceLog.objects.filter(id__in=[row[0] for row in rows]).delete()
+
+
+def iter_archived_attendance(columns, course_id=None, student_id=None, terms=None):
+    """
+    Yield archived attendance as value tuples in the order of ``columns``
+    (names from ATTENDANCE_FIELDS), newest term first.
+    """
+    for term in available_terms():
+        if terms and term not in terms:
+            continue
+        for record in TermArchive(term).read('attendance'):
+            if course_id and str(record['class_session__course_id']) != str(course_id):
+                continue
+            if student_id and str(record['student_id']) != str(student_id):
+                continue
+            yield tuple(
+                parse_datetime(record[column]) if column in DATETIME_FIELDS and record[column] else record[column]
+                for column in columns
+            )
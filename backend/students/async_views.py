@@ -0,0 +1,202 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .audit import scan_log
+from .authentication import CachedJWTAuthentication
+from .versions import bump_courses
+from .exports import encode_ndjson
+from .live import feed, publish_attendance
+from .matching import get_matcher
+from .models import ClassSession, Course
+from .permissions import aget_scanner
+from .registry import rosters
+from .scanning import mark_present, queue_scan
+from .journal import write_behind_enabled
+from .serializers import FingerprintAttendanceSerializer
+
+
+# async twin of FingerprintAttendanceViewSet.scan for the ASGI app: the
+# request only holds a thread while it writes, so one process can keep
+# hundreds of scanner requests in flight
+@csrf_exempt
+@require_POST
+async def scan(request):
+    started = time.perf_counter()
+    scanner = await aget_scanner(request.headers.get("X-SCANNER-KEY"))
+    if scanner is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=401
+        )
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        scan_log.record(scanner, 'invalid', started=started)
+        return JsonResponse({"detail": "JSON parse error"}, status=400)
+
+    serializer = FingerprintAttendanceSerializer(data=data)
+    if not serializer.is_valid():
+        scan_log.record(scanner, 'invalid', started=started)
+        return JsonResponse(serializer.errors, status=400)
+    fingerprint = serializer.validated_data['fingerprint_template']
+    session_id = serializer.validated_data['session_id']
+
+    roster = await rosters.aget(session_id)
+
+    if roster is None:
+        scan_log.record(scanner, 'invalid_session', started=started)
+        return JsonResponse({"error": "Invalid or inactive class session"}, status=400)
+
+    repeat = roster.repeat_of(fingerprint)
+    if repeat is not None:
+        scan_log.record(scanner, 'duplicate', repeat, session_id, started=started)
+        return JsonResponse({"error": "Attendance already marked"}, status=409)
+
+    match = roster.match(fingerprint)
+
+    if not match:
+        if await sync_to_async(get_matcher().lookup)(fingerprint):
+            scan_log.record(scanner, 'not_enrolled', session_id=session_id, started=started)
+            return JsonResponse({"error": "Student not enrolled"}, status=403)
+        scan_log.record(scanner, 'unknown', session_id=session_id, started=started)
+        return JsonResponse({"error": "Fingerprint not recognized"}, status=404)
+
+    student_id, username = match
+
+    if student_id in roster.marked:
+        roster.mark(student_id, fingerprint)
+        scan_log.record(scanner, 'duplicate', student_id, session_id, started=started)
+        return JsonResponse({"error": "Attendance already marked"}, status=409)
+
+    if write_behind_enabled():
+        await sync_to_async(queue_scan)(session_id, student_id, scanner, started=started)
+        roster.mark(student_id, fingerprint)
+        return JsonResponse({"message": "Attendance queued",
+                             "student": username,
+                             "course": roster.course_name}, status=202)
+
+    # transactions are not available to the async ORM
+    now = timezone.now()
+    try:
+        created = await sync_to_async(mark_present)(session_id, student_id, now)
+    except IntegrityError:
+        rosters.evict(session_id)
+        scan_log.record(scanner, 'invalid_session', started=started)
+        return JsonResponse({"error": "Invalid or inactive class session"}, status=400)
+    roster.mark(student_id, fingerprint)
+    if not created:
+        scan_log.record(scanner, 'duplicate', student_id, session_id, started=started)
+        return JsonResponse({"error": "Attendance already marked"}, status=409)
+
+    scan_log.record(scanner, 'created', student_id, session_id, started=started)
+    await sync_to_async(bump_courses)([(roster.course_id, roster.lecturer_id)])
+    publish_attendance(session_id, username, 'present', now, present=1)
+
+    return JsonResponse({"message": "Attendance marked successfully",
+                         "student": username,
+                         "course": roster.course_name}, status=201)
+
+COUNT_FIELDS = ['present', 'absent', 'late', 'excused', 'enrolled']
+
+
+def _authenticate(request):
+    # EventSource cannot set headers, so the access token may come as ?token=
+    auth = CachedJWTAuthentication()
+    try:
+        raw = request.GET.get('token')
+        if raw:
+            return auth.get_user(auth.get_validated_token(raw))
+        result = auth.authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        # inactive users and tokens revoked by a password change included
+        return None
+    return result[0] if result else None
+
+
+def _counts(session):
+    return {field: getattr(session, f'{field}_count') for field in COUNT_FIELDS}
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {encode_ndjson(data)}\n"
+
+
+async def _session_events(session, queue):
+    counts = _counts(session)
+    keepalive = getattr(settings, 'LIVE_FEED_KEEPALIVE', 15)
+    try:
+        yield _sse('counts', counts)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                # idle: pick up scans and closes handled by other processes
+                session = await ClassSession.objects.only(
+                    'is_active', *[f'{field}_count' for field in COUNT_FIELDS]
+                ).aget(pk=session.pk)
+                if not session.is_active:
+                    yield _sse('ended', {})
+                    return
+                if _counts(session) != counts:
+                    counts = _counts(session)
+                    yield _sse('counts', counts)
+                else:
+                    yield ': keepalive\n\n'
+                continue
+
+            if event["event"] == 'ended':
+                yield _sse('ended', {})
+                return
+            for status, delta in event["deltas"].items():
+                counts[status] += delta
+            yield _sse('attendance', {
+                "student": event["student"],
+                "status": event["status"],
+                "timestamp": event["timestamp"],
+                "counts": counts,
+            })
+    finally:
+        feed.unsubscribe(session.pk, queue)
+
+
+# live scans and counts for one active session as Server-Sent Events; needs
+# the ASGI app, where an idle stream holds no thread
+@require_GET
+async def session_feed(request, session_id):
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    if user.role not in ('lecturer', 'admin'):
+        return JsonResponse({"error": "Only lecturers allowed"}, status=403)
+
+    session = await ClassSession.objects.filter(pk=session_id).afirst()
+    if session is None:
+        return JsonResponse({"error": "Session not found"}, status=404)
+    if user.role == 'lecturer':
+        lecturer_id = await Course.objects.filter(pk=session.course_id).values_list('lecturer_id', flat=True).afirst()
+        if lecturer_id != user.id:
+            return JsonResponse({"error": "Session not found"}, status=404)
+    if not session.is_active:
+        return JsonResponse({"error": "Session already ended"}, status=400)
+
+    # subscribe before the counts snapshot so no scan is missed; one landing
+    # in between may be counted twice until the next idle resync
+    queue = feed.subscribe(session.pk)
+    session = await ClassSession.objects.aget(pk=session.pk)
+    response = StreamingHttpResponse(_session_events(session, queue), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,114 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import AttendanceLog, ClassSession, ScannerDevice, User
+
+logger = logging.getLogger(__name__)
+
+
+def elapsed_ms(started):
+    return int((time.perf_counter() - started) * 1000)
+
+
+class AuditBuffer:
+    """
+    Scan audit rows collected in memory and written with one bulk insert per
+    batch. A daemon thread flushes every ``interval`` seconds, or as soon as
+    ``size`` rows are waiting, so a scan never waits on the audit insert.
+    Rows still buffered when a worker is killed outright are lost.
+    """
+
+    def __init__(self, size=200, interval=2.0):
+        self.size = size
+        self.interval = interval
+        self._rows = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record(self, scanner, outcome, student_id=None, session_id=None,
+               started=None, timestamp=None):
+        row = AttendanceLog(
+            scanner_id=scanner.pk if scanner else None,
+            student_id=student_id,
+            class_session_id=session_id,
+            outcome=outcome,
+            latency_ms=elapsed_ms(started) if started is not None else None,
+            timestamp=timestamp or timezone.now()
+        )
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.size
+        self._ensure_flusher()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if rows:
+            try:
+                with transaction.atomic():
+                    AttendanceLog.objects.bulk_create(rows, batch_size=self.size)
+            except IntegrityError:
+                # something a row points at was deleted since record(); keep the batch
+                self._detach_missing(rows)
+                AttendanceLog.objects.bulk_create(rows, batch_size=self.size)
+        return len(rows)
+
+    def _detach_missing(self, rows):
+        for model, attname in (
+            (ClassSession, 'class_session_id'),
+            (User, 'student_id'),
+            (ScannerDevice, 'scanner_id'),
+        ):
+            found = set(model.objects.filter(
+                pk__in={getattr(row, attname) for row in rows}
+            ).values_list('pk', flat=True))
+            for row in rows:
+                if getattr(row, attname) not in found:
+                    setattr(row, attname, None)
+        for row in rows:
+            row.pk = None
+
+    def _ensure_flusher(self):
+        # forked workers inherit the buffer but not the thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='attendance-audit', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self._flush_quietly)
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not write attendance audit rows")
+        finally:
+            close_old_connections()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._flush_quietly()
+
+
+scan_log = AuditBuffer(
+    size=getattr(settings, 'ATTENDANCE_LOG_BATCH_SIZE', 200),
+    interval=getattr(settings, 'ATTENDANCE_LOG_FLUSH_INTERVAL', 2.0),
+)
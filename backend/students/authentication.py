@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# fields the permission checks and role branches read; anything else is
+# loaded from the database on first access
+USER_FIELDS = ['id', 'username', 'role', 'is_active']
+
+_MISSING = object()
+
+
+def _user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate_user(user_id):
+    cache.delete(_user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that builds request.user from a short-lived cache of
+    the few columns every request needs, instead of loading the row.
+
+    Saving or deleting a user drops its entry, so a role change or
+    deactivation applies to the next request; changes that bypass model
+    signals (queryset updates) apply within AUTH_USER_CACHE_TIMEOUT seconds.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = _user_cache_key(user_id)
+        cached = cache.get(key, _MISSING)
+        if cached is _MISSING:
+            row = self.user_model.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values_list(*USER_FIELDS, 'password').first()
+            # the password digest is kept for CHECK_REVOKE_TOKEN, never the hash itself
+            cached = row and (row[:-1], get_md5_hash_password(row[-1]))
+            cache.set(key, cached, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 30))
+
+        if not cached:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        values, password_digest = cached
+
+        # from_db expects the loaded fields in model field order
+        loaded = dict(zip(USER_FIELDS, values))
+        names = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in loaded]
+        user = self.user_model.from_db(
+            router.db_for_read(self.user_model), names, [loaded[name] for name in names]
+        )
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_digest:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
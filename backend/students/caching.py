@@ -0,0 +1,80 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+from .versions import current_versions
+
+
+class LRUCache:
+    """Thread-safe mapping that drops the least recently used entry past maxsize."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+responses = LRUCache(getattr(settings, 'DASHBOARD_CACHE_SIZE', 512))
+
+
+def dashboard_etag(request, scopes):
+    parts = [
+        request.path,
+        str(request.user.pk),
+        request.user.role,
+        repr(sorted(request.query_params.lists())),
+        repr(current_versions(scopes)),
+    ]
+    ttl = getattr(settings, 'DASHBOARD_CACHE_TTL', 60)
+    if ttl:
+        # versions live in CACHES; with a per-process cache another worker's
+        # bumps are invisible here, so tags also roll over every ttl seconds
+        parts.append(str(int(time.time() // ttl)))
+    return '"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def cached_dashboard(request, scopes, build):
+    """
+    Serve ``build()`` through the dashboard cache. The ETag covers the user,
+    the query string and the attendance versions of ``scopes``; a matching
+    If-None-Match gets a 304 and a cached payload is reused as is.
+    """
+    # versions are read before building, so a change made meanwhile gets a new tag
+    etag = dashboard_etag(request, scopes)
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = Response(status=304)
+    else:
+        data = responses.get(etag)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = build()
+            if response.status_code != 200:
+                return response
+            responses.set(etag, response.data)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
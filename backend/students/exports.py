@@ -0,0 +1,57 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def encode_ndjson(record):
+    return json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+
+def _lines(rows, columns, fmt):
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([
+                value.isoformat() if hasattr(value, 'isoformat') else value
+                for value in row
+            ])
+    else:
+        for row in rows:
+            yield encode_ndjson(dict(zip(columns, row)))
+
+
+def _batched(lines, size=500):
+    # fewer, larger writes without holding more than one batch in memory
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_export(rows, columns, fmt, filename):
+    """Stream an iterable of value tuples as CSV or NDJSON."""
+    response = StreamingHttpResponse(
+        _batched(_lines(rows, columns, fmt)),
+        content_type=CONTENT_TYPES[fmt]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
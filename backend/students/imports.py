@@ -0,0 +1,230 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connections, transaction
+
+from .models import Course, User
+from .registry import rosters
+from .versions import bump_courses
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert_new(objs, batch_size):
+    """
+    Bulk insert ``objs``, falling back to one insert per row when a unique
+    constraint trips because a concurrent writer got there first. Returns
+    the objects actually inserted.
+    """
+    if not objs:
+        return []
+    model = type(objs[0])
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(objs, batch_size=batch_size)
+        return objs
+    except IntegrityError:
+        pass
+    inserted = []
+    for obj in objs:
+        obj.pk = None
+        try:
+            with transaction.atomic():
+                obj.save(force_insert=True)
+        except IntegrityError:
+            continue
+        inserted.append(obj)
+    return inserted
+
+
+def import_enrollments(csv_file, chunk_size=5000, max_reported=100):
+    """
+    Enroll students from a CSV with ``course`` (course id) and ``student``
+    (username) columns. Rows are streamed in chunks: each chunk resolves its
+    courses and usernames with one query apiece and writes the through-table
+    rows with one bulk insert, so memory stays bounded for any file size.
+    """
+    Enrollment = Course.students.through
+    reader = csv.DictReader(csv_file)
+    if not reader.fieldnames or not {'course', 'student'} <= set(reader.fieldnames):
+        raise ValueError("CSV must have 'course' and 'student' columns")
+
+    summary = {"inserted": 0, "skipped": 0, "unknown": 0, "unknown_rows": []}
+    touched_courses = set()
+
+    # line 1 is the header
+    rows = enumerate(reader, start=2)
+    for chunk in _chunks(rows, chunk_size):
+        parsed = []
+        for line, row in chunk:
+            course = (row.get('course') or '').strip()
+            username = (row.get('student') or '').strip()
+            parsed.append((line, int(course) if course.isdigit() else None, username))
+
+        course_ids = set(Course.objects.filter(
+            id__in={course for _, course, _ in parsed if course is not None}
+        ).values_list('id', flat=True))
+        student_ids = dict(User.objects.filter(
+            role='student',
+            username__in={username for _, _, username in parsed if username}
+        ).values_list('username', 'id'))
+
+        pairs = set()
+        for line, course, username in parsed:
+            if course not in course_ids or username not in student_ids:
+                summary["unknown"] += 1
+                if len(summary["unknown_rows"]) < max_reported:
+                    summary["unknown_rows"].append(line)
+                continue
+            pair = (course, student_ids[username])
+            if pair in pairs:
+                summary["skipped"] += 1
+            pairs.add(pair)
+
+        existing = set(Enrollment.objects.filter(
+            course_id__in={course for course, _ in pairs},
+            user_id__in={student for _, student in pairs}
+        ).values_list('course_id', 'user_id'))
+        new_pairs = pairs - existing
+        summary["skipped"] += len(pairs & existing)
+
+        # pairs enrolled concurrently since the check above count as skipped
+        inserted = _insert_new(
+            [Enrollment(course_id=course, user_id=student) for course, student in new_pairs],
+            batch_size=1000
+        )
+        summary["inserted"] += len(inserted)
+        summary["skipped"] += len(new_pairs) - len(inserted)
+        touched_courses.update(row.course_id for row in inserted)
+
+    # bulk_create skips m2m_changed, so drop affected rosters and versions by hand
+    for course_id in touched_courses:
+        rosters.evict_course(course_id)
+    bump_courses(Course.objects.filter(pk__in=touched_courses).values_list('id', 'lecturer_id'))
+
+    return summary
+
+
+def _init_hash_worker():
+    # spawned (not forked) workers start without Django configured
+    if not apps.ready:
+        django.setup()
+
+
+def _validate_student_row(row):
+    username = (row.get('username') or '').strip()
+    email = (row.get('email') or '').strip()
+    password = row.get('password') or ''
+
+    errors = []
+    if not username:
+        errors.append("username is required")
+    else:
+        try:
+            User.username_validator(username)
+        except ValidationError as exc:
+            errors.extend(exc.messages)
+        if len(username) > 150:
+            errors.append("username is longer than 150 characters")
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError as exc:
+            errors.extend(exc.messages)
+    if not password:
+        errors.append("password is required")
+    else:
+        try:
+            validate_password(password, User(username=username, email=email))
+        except ValidationError as exc:
+            errors.extend(exc.messages)
+
+    user = User(
+        username=username,
+        email=email,
+        first_name=(row.get('first_name') or '').strip(),
+        last_name=(row.get('last_name') or '').strip(),
+        role='student',
+    )
+    return user, password, errors
+
+
+def import_students(csv_file, workers=None, chunk_size=1000):
+    """
+    Create student accounts from a CSV with ``username``, ``password`` and
+    optional ``email``, ``first_name`` and ``last_name`` columns.
+
+    Password hashing dominates the cost, so each chunk's passwords are hashed
+    across a process pool before the chunk is inserted with one bulk_create.
+    Invalid rows are reported by line number and skipped; they never abort
+    the import.
+    """
+    reader = csv.DictReader(csv_file)
+    if not reader.fieldnames or not {'username', 'password'} <= set(reader.fieldnames):
+        raise ValueError("CSV must have 'username' and 'password' columns")
+
+    summary = {"created": 0, "failed": 0, "errors": []}
+    seen = set()
+
+    # forked workers must not share the parent's database connections, so
+    # start them (pools fork lazily, on the first task) before any query
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_hash_worker) as pool:
+        pool.submit(int).result()
+        for chunk in _chunks(enumerate(reader, start=2), chunk_size):
+            validated = []
+            for line, row in chunk:
+                user, password, errors = _validate_student_row(row)
+                if user.username in seen:
+                    errors.append("duplicate username in file")
+                seen.add(user.username)
+                validated.append((line, user, password, errors))
+
+            taken = set(User.objects.filter(
+                username__in={user.username for _, user, _, _ in validated}
+            ).values_list('username', flat=True))
+
+            accepted = []
+            for line, user, password, errors in validated:
+                if user.username in taken:
+                    errors.append("username already exists")
+                if errors:
+                    summary["failed"] += 1
+                    summary["errors"].append({"line": line, "errors": errors})
+                else:
+                    accepted.append((line, user, password))
+
+            hashes = pool.map(
+                make_password,
+                [password for _, _, password in accepted],
+                chunksize=max(1, len(accepted) // ((workers or os.cpu_count()) * 4))
+            )
+            users = []
+            for (_, user, _), hashed in zip(accepted, hashes):
+                user.password = hashed
+                users.append(user)
+
+            # a concurrent registration could still claim a username
+            created = {user.username for user in _insert_new(users, batch_size=500)}
+            summary["created"] += len(created)
+            for line, user, _ in accepted:
+                if user.username not in created:
+                    summary["failed"] += 1
+                    summary["errors"].append({"line": line, "errors": ["username already exists"]})
+
+    return summary
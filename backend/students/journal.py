@@ -0,0 +1,156 @@
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .exports import encode_ndjson
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: single process, no locking needed
+    fcntl = None
+
+
+@contextmanager
+def _locked(path, exclusive=True, blocking=True):
+    with open(path, 'a+b') as handle:
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            if not blocking:
+                flags |= fcntl.LOCK_NB
+            fcntl.flock(handle, flags)
+        yield handle
+
+
+class JournalBusy(Exception):
+    pass
+
+
+class ScanJournal:
+    """
+    Durable append-only log of accepted scans.
+
+    Scans append one NDJSON line each (fsync'd before the request returns).
+    A single drainer reads everything past the checkpoint, writes it to the
+    database in batches and advances the checkpoint after each committed
+    batch. Once fully drained the file is truncated. Replaying a batch that
+    committed just before a crash is harmless: rows that already exist are
+    skipped.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.checkpoint_path = self.path + '.checkpoint'
+        self.drain_lock_path = self.path + '.drain.lock'
+
+    def _ensure_dir(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+    def append(self, event):
+        self._ensure_dir()
+        line = encode_ndjson(event).encode()
+        with _locked(self.path) as handle:
+            handle.write(line)
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {"offset": 0, "flushed_at": None}
+
+    def _write_checkpoint(self, offset):
+        checkpoint = {"offset": offset, "flushed_at": timezone.now().isoformat()}
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(checkpoint, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _pending(self):
+        """Yield (end offset, event) for every complete line past the checkpoint."""
+        offset = self.read_checkpoint()["offset"]
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as handle:
+            handle.seek(offset)
+            for line in handle:
+                if not line.endswith(b'\n'):
+                    # a writer is mid-append; pick it up next time
+                    return
+                offset += len(line)
+                yield offset, json.loads(line)
+
+    def drain(self, flush, batch_size=500):
+        """
+        Pass pending events to ``flush`` in batches; returns how many were
+        drained. Raises JournalBusy if another drainer is running.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with _locked(self.drain_lock_path, blocking=False):
+                drained = 0
+                batch = []
+                for offset, event in self._pending():
+                    batch.append(event)
+                    if len(batch) >= batch_size:
+                        flush(batch)
+                        self._write_checkpoint(offset)
+                        drained += len(batch)
+                        batch = []
+                if batch:
+                    flush(batch)
+                    self._write_checkpoint(offset)
+                    drained += len(batch)
+                self._compact()
+                return drained
+        except BlockingIOError:
+            raise JournalBusy("Another process is draining the journal")
+
+    def _compact(self):
+        # truncate only when nothing new arrived since the last checkpoint
+        with _locked(self.path) as handle:
+            handle.seek(0, os.SEEK_END)
+            if handle.tell() and handle.tell() == self.read_checkpoint()["offset"]:
+                # checkpoint first: a crash in between only replays the
+                # drained events, which is harmless; the reverse would leave
+                # the offset past the end of the new file
+                self._write_checkpoint(0)
+                handle.truncate(0)
+
+    def stats(self):
+        depth = 0
+        oldest = None
+        for _, event in self._pending():
+            if oldest is None:
+                oldest = event["accepted_at"]
+            depth += 1
+        lag = None
+        if oldest is not None:
+            lag = (timezone.now() - datetime.fromisoformat(oldest.replace('Z', '+00:00'))).total_seconds()
+        return {
+            "depth": depth,
+            "lag_seconds": lag,
+            "last_flush_at": self.read_checkpoint()["flushed_at"],
+        }
+
+
+def write_behind_enabled():
+    return getattr(settings, 'ATTENDANCE_WRITE_BEHIND', False)
+
+
+_journal = None
+
+
+def get_journal():
+    global _journal
+    if _journal is None:
+        _journal = ScanJournal(getattr(settings, 'ATTENDANCE_JOURNAL_PATH', settings.BASE_DIR / 'journal' / 'scans.ndjson'))
+    return _journal
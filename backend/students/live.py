@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+
+class SessionFeed:
+    """
+    In-process fan-out of attendance events to live listeners, keyed by
+    class session id.
+
+    Listeners are asyncio queues owned by the ASGI event loop; publishers may
+    run on any thread (sync views, sync_to_async workers), so delivery is
+    handed to the listener's loop with call_soon_threadsafe. Scans handled by
+    other processes are not seen here; listeners resync counts from the
+    database while idle.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, session_id):
+        listener = (asyncio.get_running_loop(), asyncio.Queue(self.maxsize))
+        with self._lock:
+            self._listeners.setdefault(session_id, set()).add(listener)
+        return listener[1]
+
+    def unsubscribe(self, session_id, queue):
+        with self._lock:
+            listeners = self._listeners.get(session_id, set())
+            listeners.difference_update({entry for entry in listeners if entry[1] is queue})
+            if not listeners:
+                self._listeners.pop(session_id, None)
+
+    def publish(self, session_id, event):
+        if session_id not in self._listeners:
+            return
+        with self._lock:
+            listeners = list(self._listeners.get(session_id, ()))
+        for loop, queue in listeners:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # the listener's loop is gone
+                self.unsubscribe(session_id, queue)
+
+    @staticmethod
+    def _deliver(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # a stalled client misses events; its counts resync when idle
+            pass
+
+
+feed = SessionFeed()
+
+
+def publish_attendance(session_id, student, status, timestamp, **deltas):
+    """Tell live listeners about a new or changed attendance row."""
+    feed.publish(session_id, {
+        "event": "attendance",
+        "student": student,
+        "status": status,
+        "timestamp": timestamp,
+        "deltas": deltas,
+    })
+
+
+def publish_ended(session_id):
+    feed.publish(session_id, {"event": "ended"})
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from students.archive import archive_orphan_logs, archive_root, archive_sessions, term_for
+from students.models import Attendance, AttendanceLog, ClassSession
+
+
+class Command(BaseCommand):
+    help = "Move closed sessions older than a cutoff, with their attendance and logs, into per-term archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=str, help="Archive sessions that started before this ISO datetime")
+        parser.add_argument('--older-than-days', type=int, help="Archive sessions that started this many days ago")
+        parser.add_argument('--batch-size', type=int, default=500, help="Sessions moved per chunk")
+        parser.add_argument('--dry-run', action='store_true', help="Only count what would be archived")
+        parser.add_argument('--vacuum', action='store_true', help="Reclaim the freed space afterwards")
+
+    def handle(self, *args, **options):
+        if options['before']:
+            cutoff = parse_datetime(options['before'])
+            if cutoff is None:
+                raise CommandError("--before must be an ISO datetime")
+            if timezone.is_naive(cutoff):
+                cutoff = timezone.make_aware(cutoff)
+        elif options['older_than_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        else:
+            raise CommandError("Give --before or --older-than-days")
+
+        sessions = ClassSession.objects.filter(is_active=False, start_time__lt=cutoff)
+
+        if options['dry_run']:
+            terms = {}
+            for start_time in sessions.values_list('start_time', flat=True).iterator():
+                term = term_for(start_time)
+                terms[term] = terms.get(term, 0) + 1
+            for term, count in sorted(terms.items()):
+                self.stdout.write(f"{term}: {count} sessions")
+            self.stdout.write(
+                f"{Attendance.objects.filter(class_session__in=sessions).count()} attendance rows, "
+                f"{AttendanceLog.objects.filter(class_session__in=sessions).count()} log rows"
+            )
+            return
+
+        summary = archive_sessions(sessions, batch_size=options['batch_size'])
+        orphans = archive_orphan_logs(cutoff)
+        for term, counts in sorted(summary.items()):
+            self.stdout.write(
+                f"{term}: {counts['sessions']} sessions, {counts['attendance']} attendance, "
+                f"{counts['logs'] + orphans.pop(term, 0)} logs"
+            )
+        for term, count in sorted(orphans.items()):
+            self.stdout.write(f"{term}: {count} logs")
+        self.stdout.write(self.style.SUCCESS(f"Archived to {archive_root()}"))
+
+        if options['vacuum']:
+            self.vacuum()
+
+    def vacuum(self):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+        elif connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for model in (AttendanceLog, Attendance, ClassSession):
+                    cursor.execute(f'VACUUM ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+        else:
+            self.stdout.write(f"--vacuum is not supported on {connection.vendor}, skipping")
+            return
+        self.stdout.write(self.style.SUCCESS("Vacuumed"))
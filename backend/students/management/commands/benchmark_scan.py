@@ -0,0 +1,174 @@
+import asyncio
+import base64
+import logging
+import secrets
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from students.audit import scan_log
+from students.matching import VectorMatcher, get_matcher
+from students.models import ClassSession, Course, ScannerDevice, User
+
+
+class HostAsyncClient(AsyncClient):
+    """
+    AsyncClient whose requests carry ``host`` instead of testserver: ASGI
+    requests ignore SERVER_NAME, and an extra host header would be joined
+    with the default one rather than replace it.
+    """
+
+    def __init__(self, host, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host.encode()
+
+    def _base_scope(self, **request):
+        scope = super()._base_scope(**request)
+        scope["headers"] = [
+            (name, self.host if name == b"host" else value) for name, value in scope["headers"]
+        ]
+        return scope
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare scan throughput of the synchronous (WSGI) view and the async "
+        "(ASGI) view in-process. Each path scans its own fresh active session "
+        "with one distinct enrolled student per request, so both do the same "
+        "inserts. Creates and then deletes its fixture in the configured "
+        "database, so point it at a scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--host', default='localhost', help="A host in ALLOWED_HOSTS")
+
+    def handle(self, *args, **options):
+        tag = secrets.token_hex(4)
+        templates = [self.template(get_matcher(), tag, i) for i in range(options['requests'])]
+        fixture = self.create_fixture(tag, templates)
+        options['scanner_key'] = fixture['scanner'].api_key
+
+        # lock errors are expected under load; keep them out of the output
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            sync_stats = self.run_sync(
+                reverse('attendance-scan'), self.payloads(fixture['sessions'][0], templates), options
+            )
+            async_stats = self.run_async(
+                reverse('attendance-scan-async'), self.payloads(fixture['sessions'][1], templates), options
+            )
+        finally:
+            request_logger.setLevel(level)
+            self.delete_fixture(fixture)
+
+        self.stdout.write(f"{'path':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}  statuses")
+        for name, (elapsed, latencies, statuses) in (('wsgi', sync_stats), ('asgi', async_stats)):
+            latencies.sort()
+            self.stdout.write(
+                f"{name:<8}{len(latencies) / elapsed:>10.1f}"
+                f"{statistics.median(latencies) * 1000:>10.1f}"
+                f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>10.1f}  "
+                f"{dict(statuses)}"
+            )
+
+        # anything but inserts means the two paths did not do the same work
+        for name, (_, _, statuses) in (('wsgi', sync_stats), ('asgi', async_stats)):
+            if set(statuses) != {201}:
+                raise CommandError(f"{name} requests did not all return 201: {dict(statuses)}")
+
+    def template(self, matcher, tag, i):
+        # random vectors are far apart under both metrics, so each matches one student
+        if isinstance(matcher, VectorMatcher):
+            np = matcher.np
+            if matcher.metric == 'hamming':
+                data = np.random.randint(0, 256, matcher.dimensions // 8, dtype=np.uint8).tobytes()
+            else:
+                data = np.random.standard_normal(matcher.dimensions).astype('<f4').tobytes()
+            return base64.b64encode(data).decode()
+        return f'benchmark-{tag}-{i}'
+
+    def create_fixture(self, tag, templates):
+        matcher = get_matcher()
+        lecturer = User(username=f'benchmark-{tag}-lecturer', role='lecturer')
+        lecturer.set_unusable_password()
+        lecturer.save()
+        students = []
+        for i, raw in enumerate(templates):
+            student = User(username=f'benchmark-{tag}-{i}', role='student')
+            student.set_unusable_password()
+            matcher.enroll(student, raw)
+            students.append(student)
+        User.objects.bulk_create(students, batch_size=500)
+
+        # one course per path: a course can only have one active session
+        sessions = []
+        for path in ('wsgi', 'asgi'):
+            course = Course.objects.create(name=f'Benchmark {tag} {path}', lecturer=lecturer)
+            course.students.add(*students)
+            sessions.append(ClassSession.objects.create(
+                course=course,
+                start_time=timezone.now(),
+                is_active=True,
+                enrolled_count=len(students)
+            ))
+        scanner = ScannerDevice.objects.create(name=f'Benchmark {tag}', api_key=secrets.token_hex(32))
+        return {"lecturer": lecturer, "students": students, "sessions": sessions, "scanner": scanner}
+
+    def delete_fixture(self, fixture):
+        # write the buffered audit rows before their students and sessions go
+        scan_log.flush()
+        Course.objects.filter(lecturer=fixture['lecturer']).delete()
+        User.objects.filter(pk__in=[student.pk for student in fixture['students']]).delete()
+        fixture['lecturer'].delete()
+        fixture['scanner'].delete()
+
+    def payloads(self, session, templates):
+        return [{"fingerprint_template": raw, "session_id": session.id} for raw in templates]
+
+    def run_sync(self, url, payloads, options):
+        def send(payload):
+            client = Client(SERVER_NAME=options['host'], raise_request_exception=False)
+            started = time.perf_counter()
+            response = client.post(
+                url, payload, content_type='application/json',
+                HTTP_X_SCANNER_KEY=options['scanner_key']
+            )
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(send, payloads))
+        return self.collect(time.perf_counter() - started, results)
+
+    def run_async(self, url, payloads, options):
+        client = HostAsyncClient(options['host'], raise_request_exception=False)
+        limit = asyncio.Semaphore(options['concurrency'])
+
+        async def send(payload):
+            async with limit:
+                started = time.perf_counter()
+                response = await client.post(
+                    url, payload, content_type='application/json',
+                    headers={"X-Scanner-Key": options['scanner_key']}
+                )
+                return time.perf_counter() - started, response.status_code
+
+        async def run():
+            return await asyncio.gather(*(send(payload) for payload in payloads))
+
+        started = time.perf_counter()
+        results = asyncio.run(run())
+        return self.collect(time.perf_counter() - started, results)
+
+    def collect(self, elapsed, results):
+        return elapsed, [latency for latency, _ in results], Counter(code for _, code in results)
@@ -0,0 +1,66 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from students.models import ClassSession
+
+
+class Command(BaseCommand):
+    help = "End active class sessions in bulk and record absentees"
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_ids', nargs='*', type=int, help="Sessions to end")
+        parser.add_argument(
+            '--started-before', type=str,
+            help="End every active session that started before this ISO datetime"
+        )
+        parser.add_argument(
+            '--stale', action='store_true',
+            help="End sessions running longer than CLASS_SESSION_MAX_DURATION"
+        )
+        parser.add_argument(
+            '--max-duration', type=int,
+            help="Override CLASS_SESSION_MAX_DURATION (seconds) for --stale"
+        )
+        parser.add_argument(
+            '--interval', type=int,
+            help="With --stale, keep running and sweep every this many seconds"
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not (options['session_ids'] or options['started_before'] or options['stale']):
+            raise CommandError("Give session ids, --started-before or --stale")
+        if options['interval'] and not options['stale']:
+            raise CommandError("--interval only applies to --stale")
+
+        if not options['interval']:
+            self.sweep(options)
+            return
+
+        try:
+            while True:
+                close_old_connections()
+                self.sweep(options)
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def sweep(self, options):
+        sessions = ClassSession.objects.filter(is_active=True)
+        if options['session_ids']:
+            sessions = sessions.filter(id__in=options['session_ids'])
+        if options['started_before']:
+            sessions = sessions.filter(start_time__lt=options['started_before'])
+
+        max_duration = None
+        if options['stale']:
+            seconds = options['max_duration'] or getattr(settings, 'CLASS_SESSION_MAX_DURATION', 4 * 60 * 60)
+            max_duration = timedelta(seconds=seconds)
+            sessions = sessions.stale(max_duration)
+
+        closed = sessions.close(max_duration=max_duration, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Closed {len(closed)} sessions"))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from students.journal import JournalBusy, get_journal
+from students.scanning import flush_scans
+
+
+class Command(BaseCommand):
+    help = "Write journaled scans to the database (ATTENDANCE_WRITE_BEHIND mode)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--interval', type=float,
+            help="Keep running and drain every this many seconds"
+        )
+        parser.add_argument('--stats', action='store_true', help="Print queue depth and lag, then exit")
+
+    def handle(self, *args, **options):
+        journal = get_journal()
+        if options['stats']:
+            stats = journal.stats()
+            self.stdout.write(
+                f"depth={stats['depth']} lag_seconds={stats['lag_seconds']} "
+                f"last_flush_at={stats['last_flush_at']}"
+            )
+            return
+
+        if not options['interval']:
+            self.drain(journal, options)
+            return
+
+        try:
+            while True:
+                close_old_connections()
+                self.drain(journal, options, quiet=True)
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def drain(self, journal, options, quiet=False):
+        try:
+            drained = journal.drain(flush_scans, batch_size=options['batch_size'])
+        except JournalBusy as exc:
+            raise CommandError(str(exc))
+        if drained or not quiet:
+            self.stdout.write(self.style.SUCCESS(f"Drained {drained} scans"))
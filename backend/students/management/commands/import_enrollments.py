@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.imports import import_enrollments
+
+
+class Command(BaseCommand):
+    help = "Bulk-enroll students from a CSV with 'course' (id) and 'student' (username) columns"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                summary = import_enrollments(csv_file, chunk_size=options['chunk_size'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {summary['inserted']}, skipped {summary['skipped']}, unknown {summary['unknown']}"
+        ))
+        if summary['unknown_rows']:
+            self.stdout.write("Unknown rows (first %d): %s" % (
+                len(summary['unknown_rows']),
+                ', '.join(map(str, summary['unknown_rows']))
+            ))
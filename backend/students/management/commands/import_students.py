@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.imports import import_students
+
+
+class Command(BaseCommand):
+    help = "Bulk-create student accounts from a CSV, hashing passwords in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--workers', type=int, help="Hashing processes (default: all cores)")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                summary = import_students(
+                    csv_file,
+                    workers=options['workers'],
+                    chunk_size=options['chunk_size']
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for error in summary['errors']:
+            self.stderr.write(f"line {error['line']}: {'; '.join(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['created']} students, {summary['failed']} rows failed"
+        ))
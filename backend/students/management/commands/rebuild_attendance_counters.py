@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from students.models import Attendance, ClassSession, Course
+from students.versions import bump_courses
+
+STATUSES = [status for status, _ in Attendance.STATUS_CHOICES]
+COUNTER_FIELDS = [f'{status}_count' for status in STATUSES]
+
+
+class Command(BaseCommand):
+    help = "Recompute ClassSession attendance counters from the raw Attendance rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only report sessions whose counters disagree; exit non-zero if any do"
+        )
+        parser.add_argument(
+            '--enrolled', action='store_true',
+            help="Also re-snapshot enrolled_count from current course enrollment"
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        counts = {}
+        rows = Attendance.objects.values('class_session_id', 'status').annotate(n=Count('id'))
+        for row in rows:
+            counts.setdefault(row['class_session_id'], {})[row['status']] = row['n']
+
+        fields = list(COUNTER_FIELDS)
+        enrolled = {}
+        if options['enrolled']:
+            fields.append('enrolled_count')
+            enrolled = dict(
+                Course.students.through.objects.values('course_id')
+                .annotate(n=Count('id')).values_list('course_id', 'n')
+            )
+
+        stale = []
+        checked = 0
+        sessions = ClassSession.objects.only('id', 'course_id', *fields).iterator(
+            chunk_size=options['batch_size']
+        )
+        for session in sessions:
+            checked += 1
+            expected = {
+                f'{status}_count': counts.get(session.id, {}).get(status, 0)
+                for status in STATUSES
+            }
+            if options['enrolled']:
+                expected['enrolled_count'] = enrolled.get(session.course_id, 0)
+
+            actual = {field: getattr(session, field) for field in expected}
+            if actual != expected:
+                if options['check']:
+                    self.stdout.write(f"session {session.id}: {actual} != {expected}")
+                for field, value in expected.items():
+                    setattr(session, field, value)
+                stale.append(session)
+
+        if options['check']:
+            if stale:
+                raise CommandError(f"{len(stale)} of {checked} sessions have stale counters")
+            self.stdout.write(self.style.SUCCESS(f"All {checked} sessions have correct counters"))
+            return
+
+        with transaction.atomic():
+            ClassSession.objects.bulk_update(stale, fields, batch_size=options['batch_size'])
+        # bulk_update sends no signals; dashboards must drop the old counts
+        bump_courses(Course.objects.filter(
+            pk__in={session.course_id for session in stale}
+        ).values_list('id', 'lecturer_id'))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {len(stale)} of {checked} sessions"))
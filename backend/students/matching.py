@@ -0,0 +1,195 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from .models import User
+
+
+class HashMatcher:
+    """Exact matching on the SHA-256 of the raw template (simulated scanners)."""
+
+    def __init__(self, **options):
+        pass
+
+    def validate(self, raw_fingerprint):
+        pass
+
+    def enroll(self, user, raw_fingerprint):
+        user.set_fingerprint(raw_fingerprint)
+
+    def build_index(self, students):
+        rows = students.filter(
+            fingerprint_template__isnull=False
+        ).values_list('fingerprint_template', 'id', 'username')
+        return {template: (pk, username) for template, pk, username in rows}
+
+    def add(self, index, user):
+        index[user.fingerprint_template] = (user.id, user.username)
+
+    def match(self, index, raw_fingerprint):
+        return index.get(User.hash_fingerprint(raw_fingerprint))
+
+    def lookup(self, raw_fingerprint):
+        # the unique index on fingerprint_template makes this a single probe
+        return User.objects.filter(
+            role='student',
+            fingerprint_template=User.hash_fingerprint(raw_fingerprint)
+        ).exists()
+
+    def lookup_many(self, raw_fingerprints):
+        """Return the subset of raw templates that belong to some student."""
+        hashes = {User.hash_fingerprint(raw): raw for raw in raw_fingerprints}
+        known = User.objects.filter(
+            role='student',
+            fingerprint_template__in=hashes
+        ).values_list('fingerprint_template', flat=True)
+        return {hashes[template] for template in known}
+
+
+class VectorIndex:
+    """Contiguous matrix of enrolled templates, grown in place as students register."""
+
+    def __init__(self, np, width, dtype, capacity=64):
+        self.np = np
+        self.matrix = np.zeros((capacity, width), dtype=dtype)
+        self.students = []
+
+    def __len__(self):
+        return len(self.students)
+
+    def append(self, vector, student):
+        size = len(self.students)
+        if size == self.matrix.shape[0]:
+            grown = self.np.zeros((size * 2, self.matrix.shape[1]), dtype=self.matrix.dtype)
+            grown[:size] = self.matrix
+            self.matrix = grown
+        self.matrix[size] = vector
+        self.students.append(student)
+
+    def rows(self):
+        return self.matrix[:len(self.students)]
+
+
+class VectorMatcher:
+    """
+    Similarity matching on fixed-length feature vectors.
+
+    Templates are base64 strings: packed bits for the ``hamming`` metric or
+    little-endian float32 values for ``cosine``. A probe is scored against the
+    whole roster with one matrix-vector operation and accepted when it clears
+    ``threshold`` (minimum cosine similarity, or maximum fraction of differing
+    bits for hamming).
+    """
+
+    METRICS = ('cosine', 'hamming')
+
+    def __init__(self, metric='cosine', threshold=None, dimensions=128):
+        try:
+            import numpy
+        except ImportError:
+            raise ImproperlyConfigured("VectorMatcher requires numpy")
+        if metric not in self.METRICS:
+            raise ImproperlyConfigured(f"Unknown fingerprint metric '{metric}'")
+        if metric == 'hamming' and dimensions % 8:
+            raise ImproperlyConfigured("Hamming templates need a multiple of 8 dimensions")
+        self.np = numpy
+        self.metric = metric
+        self.dimensions = dimensions
+        if threshold is None:
+            threshold = 0.9 if metric == 'cosine' else 0.25
+        self.threshold = threshold
+
+    def decode(self, raw_fingerprint):
+        np = self.np
+        try:
+            data = base64.b64decode(raw_fingerprint, validate=True)
+        except (binascii.Error, ValueError):
+            raise ValueError("Fingerprint template is not valid base64")
+
+        if self.metric == 'hamming':
+            if len(data) != self.dimensions // 8:
+                raise ValueError(f"Expected a {self.dimensions}-bit template")
+            return np.frombuffer(data, dtype=np.uint8)
+
+        if len(data) != self.dimensions * 4:
+            raise ValueError(f"Expected a {self.dimensions}-value template")
+        vector = np.frombuffer(data, dtype='<f4').astype(np.float32)
+        norm = np.linalg.norm(vector)
+        if not np.isfinite(norm) or norm == 0:
+            raise ValueError("Fingerprint template is empty")
+        return vector / norm
+
+    def validate(self, raw_fingerprint):
+        self.decode(raw_fingerprint)
+
+    def enroll(self, user, raw_fingerprint):
+        # the hash still marks the student as registered
+        user.set_fingerprint(raw_fingerprint)
+        user.fingerprint_vector = self.decode(raw_fingerprint).tobytes()
+
+    def _empty_index(self):
+        np = self.np
+        if self.metric == 'hamming':
+            return VectorIndex(np, self.dimensions // 8, np.uint8)
+        return VectorIndex(np, self.dimensions, np.float32)
+
+    def _stored(self, value):
+        dtype = self.np.uint8 if self.metric == 'hamming' else self.np.float32
+        return self.np.frombuffer(bytes(value), dtype=dtype)
+
+    def build_index(self, students):
+        index = self._empty_index()
+        rows = students.filter(
+            fingerprint_vector__isnull=False
+        ).values_list('fingerprint_vector', 'id', 'username')
+        for vector, pk, username in rows:
+            index.append(self._stored(vector), (pk, username))
+        return index
+
+    def add(self, index, user):
+        if user.fingerprint_vector is not None:
+            index.append(self._stored(user.fingerprint_vector), (user.id, user.username))
+
+    def match(self, index, raw_fingerprint):
+        if not len(index):
+            return None
+        np = self.np
+        try:
+            probe = self.decode(raw_fingerprint)
+        except ValueError:
+            return None
+
+        rows = index.rows()
+        if self.metric == 'hamming':
+            distances = np.unpackbits(rows ^ probe, axis=1).sum(axis=1)
+            best = int(distances.argmin())
+            if distances[best] > self.threshold * self.dimensions:
+                return None
+        else:
+            scores = rows @ probe
+            best = int(scores.argmax())
+            if scores[best] < self.threshold:
+                return None
+        return index.students[best]
+
+    def lookup(self, raw_fingerprint):
+        # no population-wide index for similarity matching; misses read as unknown
+        return False
+
+    def lookup_many(self, raw_fingerprints):
+        return set()
+
+
+_matcher = None
+
+
+def get_matcher():
+    global _matcher
+    if _matcher is None:
+        config = getattr(settings, 'FINGERPRINT_MATCHER', {})
+        backend = import_string(config.get('BACKEND', 'students.matching.HashMatcher'))
+        _matcher = backend(**config.get('OPTIONS', {}))
+    return _matcher
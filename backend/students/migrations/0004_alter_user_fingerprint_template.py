@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:14
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def clear_duplicate_templates(apps, schema_editor):
+    # the earliest user keeps a shared template; the others must re-register
+    User = apps.get_model('students', 'User')
+    # blank templates are unregistered users, and would collide once unique
+    User.objects.filter(fingerprint_template='').update(fingerprint_template=None)
+    duplicates = (
+        User.objects.exclude(fingerprint_template__isnull=True)
+        .values('fingerprint_template')
+        .annotate(first_id=Min('id'), users=Count('id'))
+        .filter(users__gt=1)
+    )
+    for dup in duplicates:
+        User.objects.filter(
+            fingerprint_template=dup['fingerprint_template']
+        ).exclude(id=dup['first_id']).update(fingerprint_template=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_rename_fingerprint_hash_user_fingerprint_template'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_templates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='fingerprint_template',
+            field=models.CharField(blank=True, max_length=256, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_alter_user_fingerprint_template'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='fingerprint_vector',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:18
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_attendance(apps, schema_editor):
+    # keep the earliest row for every (student, class_session) pair
+    Attendance = apps.get_model('students', 'Attendance')
+    duplicates = (
+        Attendance.objects.values('student', 'class_session')
+        .annotate(first_id=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        Attendance.objects.filter(
+            student=dup['student'],
+            class_session=dup['class_session']
+        ).exclude(id=dup['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_alter_attendance_timestamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attendance, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['class_session', 'timestamp'], name='students_at_class_s_b86740_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'timestamp'], name='students_at_student_5d7aa4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['class_session', 'status'], name='students_at_class_s_e06e76_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classsession',
+            index=models.Index(fields=['course', 'start_time'], name='students_cl_course__8a9839_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('student', 'class_session'), name='unique_attendance_per_session'),
+        ),
+    ]
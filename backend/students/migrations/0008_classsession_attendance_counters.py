@@ -0,0 +1,67 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:19
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    ClassSession = apps.get_model('students', 'ClassSession')
+    Attendance = apps.get_model('students', 'Attendance')
+    Course = apps.get_model('students', 'Course')
+
+    counts = {}
+    for row in Attendance.objects.values('class_session_id', 'status').annotate(n=Count('id')):
+        counts.setdefault(row['class_session_id'], {})[row['status']] = row['n']
+    enrolled = dict(
+        Course.students.through.objects.values('course_id')
+        .annotate(n=Count('id')).values_list('course_id', 'n')
+    )
+
+    sessions = []
+    for session in ClassSession.objects.all().iterator():
+        session_counts = counts.get(session.id, {})
+        for status in ('present', 'absent', 'late', 'excused'):
+            setattr(session, f'{status}_count', session_counts.get(status, 0))
+        session.enrolled_count = enrolled.get(session.course_id, 0)
+        sessions.append(session)
+    ClassSession.objects.bulk_update(
+        sessions,
+        ['present_count', 'absent_count', 'late_count', 'excused_count', 'enrolled_count'],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_attendance_students_at_class_s_b86740_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classsession',
+            name='absent_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='classsession',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='classsession',
+            name='excused_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='classsession',
+            name='late_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='classsession',
+            name='present_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
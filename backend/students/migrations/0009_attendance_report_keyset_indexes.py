@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('students', '0008_classsession_attendance_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['-timestamp', '-id'], name='students_at_timesta_a6ac40_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'id'], name='students_us_role_ab4575_idx'),
+        ),
+    ]
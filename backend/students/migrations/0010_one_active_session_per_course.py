@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:22
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def deactivate_duplicate_active_sessions(apps, schema_editor):
+    # keep the newest active session per course; earlier ones were orphaned
+    ClassSession = apps.get_model('students', 'ClassSession')
+    seen = set()
+    stale = []
+    for session in ClassSession.objects.filter(is_active=True).order_by('course_id', '-start_time'):
+        if session.course_id in seen:
+            stale.append(session.id)
+        seen.add(session.course_id)
+    ClassSession.objects.filter(id__in=stale).update(is_active=False, end_time=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0009_attendance_report_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(deactivate_duplicate_active_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='classsession',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('course',), name='one_active_session_per_course'),
+        ),
+    ]
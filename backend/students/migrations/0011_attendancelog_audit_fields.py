@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0010_one_active_session_per_course'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancelog',
+            name='class_session',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='students.classsession'),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='outcome',
+            field=models.CharField(choices=[('created', 'Created'), ('queued', 'Queued'), ('updated', 'Updated'), ('duplicate', 'Duplicate'), ('not_enrolled', 'Not enrolled'), ('unknown', 'Unknown fingerprint'), ('invalid_session', 'Invalid session'), ('invalid', 'Invalid request')], default='created', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='attendancelog',
+            name='student',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='attendancelog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(fields=['scanner', 'timestamp'], name='students_at_scanner_b23049_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(fields=['student', 'timestamp'], name='students_at_student_672547_idx'),
+        ),
+    ]
@@ -1,7 +1,11 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 import hashlib
 
+from .versions import bump_courses, bump_roster
+
 class User(AbstractUser):
     ROLE_CHOICES = [
         ('admin', 'Admin'),
@@ -9,17 +13,26 @@ class User(AbstractUser):
         ('student', 'Student'),
     ]
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
-    fingerprint_template = models.CharField(max_length=256, blank=True, null=True)
+    # unique index so a scan resolves the student with one indexed lookup
+    fingerprint_template = models.CharField(max_length=256, blank=True, null=True, unique=True)
+    # feature vector used by similarity matchers (see students.matching)
+    fingerprint_vector = models.BinaryField(blank=True, null=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # keyset pages of the admin user list filtered by role
+            models.Index(fields=['role', 'id']),
+        ]
+
+    @staticmethod
+    def hash_fingerprint(raw_fingerprint):
+        return hashlib.sha256(raw_fingerprint.encode()).hexdigest()
 
     def set_fingerprint(self, raw_fingerprint):
-        self.fingerprint_template = hashlib.sha256(
-            raw_fingerprint.encode()
-        ).hexdigest()
+        self.fingerprint_template = self.hash_fingerprint(raw_fingerprint)
 
     def check_fingerprint(self, raw_fingerprint):
-        return self.fingerprint_template == hashlib.sha256(
-            raw_fingerprint.encode()
-        ).hexdigest()
+        return self.fingerprint_template == self.hash_fingerprint(raw_fingerprint)
 
 class Course(models.Model):
     name = models.CharField(max_length=100)
@@ -40,11 +53,101 @@ class Course(models.Model):
         return self.name
 
 
+class ClassSessionQuerySet(models.QuerySet):
+    def bump_counts(self, **deltas):
+        """Atomically adjust attendance counters, e.g. bump_counts(present=1, absent=-1)."""
+        changes = {
+            f'{status}_count': F(f'{status}_count') + delta
+            for status, delta in deltas.items() if delta
+        }
+        return self.update(**changes) if changes else 0
+
+    def stale(self, max_duration, now=None):
+        """Active sessions that have run longer than max_duration."""
+        now = now or timezone.now()
+        return self.filter(is_active=True, start_time__lt=now - max_duration)
+
+    def close(self, end_time=None, max_duration=None, batch_size=1000):
+        """
+        End the active sessions in this queryset and record an absent row for
+        every enrolled student who never scanned. Each session closes in its
+        own transaction; returns the ids that were closed.
+
+        With max_duration, a session's end_time is capped at start_time +
+        max_duration, so a forgotten session does not appear to run for days.
+        """
+        end_time = end_time or timezone.now()
+        closed = []
+        sessions = list(self.filter(is_active=True).values_list(
+            'id', 'course_id', 'course__lecturer_id', 'start_time'
+        ))
+        for session_id, course_id, lecturer_id, start_time in sessions:
+            session_end = end_time
+            if max_duration is not None:
+                session_end = min(end_time, start_time + max_duration)
+
+            with transaction.atomic():
+                # another request may have ended it since we looked
+                if not ClassSession.objects.filter(pk=session_id, is_active=True).update(
+                    is_active=False, end_time=session_end
+                ):
+                    continue
+
+                absent_ids = list(
+                    Course.students.through.objects.filter(course_id=course_id)
+                    .exclude(user_id__in=Attendance.objects.filter(
+                        class_session_id=session_id
+                    ).values('student_id'))
+                    .values_list('user_id', flat=True)
+                )
+                Attendance.objects.bulk_create(
+                    [
+                        Attendance(
+                            student_id=student_id,
+                            class_session_id=session_id,
+                            status='absent',
+                            timestamp=session_end
+                        )
+                        for student_id in absent_ids
+                    ],
+                    batch_size=batch_size,
+                    ignore_conflicts=True
+                )
+                ClassSession.objects.filter(pk=session_id).bump_counts(absent=len(absent_ids))
+            closed.append(session_id)
+            bump_courses([(course_id, lecturer_id)])
+            bump_roster(course_id)
+        return closed
+
+
 class ClassSession(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=False)
+    # maintained alongside Attendance writes; rebuild_attendance_counters repairs drift
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    excused_count = models.PositiveIntegerField(default=0)
+    # course enrollment when the session started
+    enrolled_count = models.PositiveIntegerField(default=0)
+
+    objects = ClassSessionQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # partial unique index: the "active session for this course?" check
+            # stays a single index probe however many sessions accumulate
+            models.UniqueConstraint(
+                fields=['course'],
+                condition=models.Q(is_active=True),
+                name='one_active_session_per_course'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'start_time']),
+        ]
 
     def __str__(self):
         return f"{self.course.name} - {self.start_time}"
@@ -59,7 +162,24 @@ class Attendance(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role':'student'})
     class_session = models.ForeignKey(ClassSession, on_delete=models.CASCADE)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # defaults to now but keeps the capture time of replayed offline scans
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # one row per student per session, even when two scanners race
+            models.UniqueConstraint(
+                fields=['student', 'class_session'],
+                name='unique_attendance_per_session'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['class_session', 'timestamp']),
+            models.Index(fields=['student', 'timestamp']),
+            models.Index(fields=['class_session', 'status']),
+            # keyset pagination of the admin report
+            models.Index(fields=['-timestamp', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.student.username} - {self.class_session} - {self.status}"
@@ -75,6 +195,27 @@ class ScannerDevice(models.Model):
         return f"{self.name} - {'Active' if self.is_active else 'Inactive'}"
 
 class AttendanceLog(models.Model):
-    student = models.ForeignKey(User, on_delete=models.CASCADE)
+    OUTCOME_CHOICES = [
+        ('created', 'Created'),
+        ('queued', 'Queued'),
+        ('updated', 'Updated'),
+        ('duplicate', 'Duplicate'),
+        ('not_enrolled', 'Not enrolled'),
+        ('unknown', 'Unknown fingerprint'),
+        ('invalid_session', 'Invalid session'),
+        ('invalid', 'Invalid request'),
+    ]
+    # empty when the fingerprint did not resolve to a student
+    student = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     scanner = models.ForeignKey(ScannerDevice, on_delete=models.SET_NULL, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    class_session = models.ForeignKey(ClassSession, on_delete=models.SET_NULL, null=True, blank=True)
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES, default='created')
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    # set when the scan is handled, not when the buffered row is flushed
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['scanner', 'timestamp']),
+            models.Index(fields=['student', 'timestamp']),
+        ]
@@ -1,4 +1,46 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.permissions import BasePermission
+from .models import ScannerDevice
+
+_MISSING = object()
+
+
+def _scanner_cache_key(api_key):
+    return 'scanner:' + hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def get_scanner(api_key):
+    """Return the active ScannerDevice for an API key, caching hits and misses."""
+    if not api_key:
+        return None
+    key = _scanner_cache_key(api_key)
+    scanner = cache.get(key, _MISSING)
+    if scanner is _MISSING:
+        scanner = ScannerDevice.objects.filter(api_key=api_key, is_active=True).first()
+        # the timeout bounds how long another process can keep a revoked key
+        cache.set(key, scanner, getattr(settings, 'SCANNER_CACHE_TIMEOUT', 30))
+    return scanner
+
+
+async def aget_scanner(api_key):
+    """Async variant of get_scanner() for the ASGI scan path."""
+    if not api_key:
+        return None
+    key = _scanner_cache_key(api_key)
+    scanner = await cache.aget(key, _MISSING)
+    if scanner is _MISSING:
+        scanner = await ScannerDevice.objects.filter(api_key=api_key, is_active=True).afirst()
+        await cache.aset(key, scanner, getattr(settings, 'SCANNER_CACHE_TIMEOUT', 30))
+    return scanner
+
+
+def invalidate_scanner(api_key):
+    if api_key:
+        cache.delete(_scanner_cache_key(api_key))
+
 
 class IsLecturer(BasePermission):
     def has_permission(self, request, view):
@@ -11,11 +53,9 @@ class IsStudent(BasePermission):
 
 class IsValidScanner(BasePermission):
     def has_permission(self, request, view):
-        api_key = request.headers.get("X-SCANNER-KEY")
-        return ScannerDevice.objects.filter(
-            api_key=api_key,
-            is_active=True
-        ).exists()
+        # keep the device on the request so scans can be attributed to it
+        request.scanner = get_scanner(request.headers.get("X-SCANNER-KEY"))
+        return request.scanner is not None
 
 class IsLecturerOnly(BasePermission):
     def has_permission(self, request, view):
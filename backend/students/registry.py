@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .matching import get_matcher
+from .models import Attendance, ClassSession, Course, User
+from .versions import aroster_generation, bump_roster, roster_generation
+
+LOCAL_ROSTER_MAX_AGE = 5
+
+
+class SessionRoster:
+    """Everything a scan needs about one active class session."""
+
+    def __init__(self, session_id, course_id, lecturer_id, course_name, enrolled, index,
+                 marked=(), generation=None):
+        self.session_id = session_id
+        self.course_id = course_id
+        self.lecturer_id = lecturer_id
+        self.course_name = course_name
+        # ids of every enrolled student, registered template or not
+        self.enrolled = enrolled
+        # matcher-specific index over the enrolled students' templates
+        self.index = index
+        # students who already have a row for this session
+        self.marked = set(marked)
+        # digest of a capture that was already handled -> student id, so a
+        # byte-identical repeat is answered before matching
+        self.probes = {}
+        # course roster generation this was built from (see versions.bump_roster)
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def build(cls, session, generation=None):
+        index = get_matcher().build_index(session.course.students.all())
+        enrolled = frozenset(
+            Course.students.through.objects.filter(
+                course_id=session.course_id
+            ).values_list('user_id', flat=True)
+        )
+        marked = Attendance.objects.filter(
+            class_session_id=session.id
+        ).values_list('student_id', flat=True)
+        return cls(
+            session.id, session.course_id, session.course.lecturer_id,
+            session.course.name, enrolled, index, marked, generation
+        )
+
+    def match(self, raw_fingerprint):
+        """Return (student id, username) for an enrolled match, else None."""
+        return get_matcher().match(self.index, raw_fingerprint)
+
+    def repeat_of(self, raw_fingerprint):
+        """Student id if this exact capture already marked someone, else None."""
+        return self.probes.get(User.hash_fingerprint(raw_fingerprint))
+
+    def mark(self, student_id, raw_fingerprint=None):
+        # only ever a shortcut: a student missing here still hits the unique constraint
+        self.marked.add(student_id)
+        if raw_fingerprint is not None:
+            self.probes[User.hash_fingerprint(raw_fingerprint)] = student_id
+
+
+class RosterRegistry:
+    """
+    Process-local registry of active sessions, built on session start and
+    dropped on end.
+
+    Changes made by other processes (a session ending, enrollment edits,
+    newly registered templates) bump a per-course generation in CACHES; a
+    roster built from an older generation is rebuilt on its next use.
+    Rosters are also rebuilt after ROSTER_MAX_AGE seconds, or after
+    LOCAL_ROSTER_MAX_AGE when CACHES is per-process and generations cannot
+    reach other workers.
+    """
+
+    def __init__(self):
+        self._rosters = {}
+        self._lock = threading.Lock()
+
+    def load(self, session):
+        # read the generation first so a change made during the build is not missed
+        roster = SessionRoster.build(session, generation=roster_generation(session.course_id))
+        with self._lock:
+            self._rosters[session.id] = roster
+        return roster
+
+    def _load_active(self, session_id):
+        session = ClassSession.objects.filter(
+            id=session_id,
+            is_active=True
+        ).select_related('course').first()
+        if session is None:
+            self.evict(session_id)
+            return None
+        return self.load(session)
+
+    def _fresh(self, roster, generation):
+        max_age = getattr(settings, 'ROSTER_MAX_AGE', 300)
+        if isinstance(caches['default'], LocMemCache):
+            # generations never leave this process; other workers' changes
+            # only show up on a rebuild
+            max_age = min(max_age, LOCAL_ROSTER_MAX_AGE)
+        return roster.generation == generation and time.monotonic() - roster.loaded_at < max_age
+
+    def get(self, session_id):
+        """Roster for an active session, or None; no queries once loaded."""
+        roster = self._rosters.get(session_id)
+        if roster is not None and self._fresh(roster, roster_generation(roster.course_id)):
+            return roster
+        # another worker may have started the session, so build lazily on a miss
+        return self._load_active(session_id)
+
+    async def aget(self, session_id):
+        roster = self._rosters.get(session_id)
+        if roster is not None and self._fresh(roster, await aroster_generation(roster.course_id)):
+            return roster
+        return await sync_to_async(self._load_active)(session_id)
+
+    def evict(self, session_id):
+        with self._lock:
+            self._rosters.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._rosters.clear()
+
+    def evict_course(self, course_id):
+        # enrollment changed; the next scan rebuilds the roster, in every worker
+        bump_roster(course_id)
+        with self._lock:
+            for session_id, roster in list(self._rosters.items()):
+                if roster.course_id == course_id:
+                    del self._rosters[session_id]
+
+    def add_student(self, user):
+        # extend this worker's rosters in place; other workers see the bumped
+        # generation and rebuild theirs
+        matcher = get_matcher()
+        for course_id in user.courses_enrolled.values_list('id', flat=True):
+            replaced, generation = bump_roster(course_id)
+            with self._lock:
+                for roster in self._rosters.values():
+                    # a roster that missed some other change is left to rebuild
+                    if roster.course_id == course_id and roster.generation == replaced:
+                        matcher.add(roster.index, user)
+                        roster.generation = generation
+
+    def verify(self):
+        """
+        Compare the cached rosters with the database, evicting any that
+        drifted. Returns a report for this process.
+        """
+        with self._lock:
+            cached = dict(self._rosters)
+        active = {
+            pk: (course_id, lecturer_id, name)
+            for pk, course_id, lecturer_id, name in ClassSession.objects.filter(
+                id__in=cached, is_active=True
+            ).values_list('id', 'course_id', 'course__lecturer_id', 'course__name')
+        }
+        enrolled = {}
+        for course_id, user_id in Course.students.through.objects.filter(
+            course_id__in={roster.course_id for roster in cached.values()}
+        ).values_list('course_id', 'user_id'):
+            enrolled.setdefault(course_id, set()).add(user_id)
+
+        drift = []
+        for session_id, roster in cached.items():
+            if session_id not in active:
+                reason = 'inactive'
+            elif active[session_id] != (roster.course_id, roster.lecturer_id, roster.course_name):
+                reason = 'course'
+            elif enrolled.get(roster.course_id, set()) != roster.enrolled:
+                reason = 'enrollment'
+            else:
+                continue
+            drift.append({"session_id": session_id, "reason": reason})
+            self.evict(session_id)
+        return {"pid": os.getpid(), "cached": len(cached), "drift": drift}
+
+
+rosters = RosterRegistry()
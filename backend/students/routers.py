@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+REPORTS_DB = 'reports'
+
+_report_reads = ContextVar('report_reads', default=False)
+
+
+@contextmanager
+def report_reads():
+    """Route reads made inside the block to the read-only reports connection."""
+    token = _report_reads.set(True)
+    try:
+        yield
+    finally:
+        _report_reads.reset(token)
+
+
+class ReportRouter:
+    """
+    Sends report and dashboard reads to the 'reports' alias when it is
+    configured. It points at the same SQLite file with query_only set, so a
+    long report runs on its own connection and, under WAL, never holds up
+    scan writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _report_reads.get() and REPORTS_DB in connections.databases:
+            return REPORTS_DB
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases are the same database
+        databases = {'default', REPORTS_DB}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPORTS_DB:
+            return False
+        return None
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .audit import elapsed_ms
+from .journal import get_journal
+from .models import Attendance, AttendanceLog, ClassSession
+from .versions import bump_courses
+
+
+def mark_present(session_id, student_id, timestamp=None):
+    """
+    Insert a present row and bump the session counter in one transaction.
+    Returns False when the student was already marked for this session;
+    any other IntegrityError (e.g. the session was deleted) is re-raised.
+    """
+    # the unique constraint turns a repeat scan into a conflict, no pre-check needed
+    try:
+        with transaction.atomic():
+            Attendance.objects.create(
+                student_id=student_id,
+                class_session_id=session_id,
+                status='present',
+                timestamp=timestamp or timezone.now()
+            )
+            ClassSession.objects.filter(pk=session_id).bump_counts(present=1)
+    except IntegrityError:
+        # SQLite reports foreign keys at commit, so not every conflict is a repeat
+        if Attendance.objects.filter(class_session_id=session_id, student_id=student_id).exists():
+            return False
+        raise
+    return True
+
+
+def queue_scan(session_id, student_id, scanner, started=None):
+    """Append an accepted scan to the write-behind journal."""
+    now = timezone.now()
+    get_journal().append({
+        "session_id": session_id,
+        "student_id": student_id,
+        "scanner_id": scanner.pk if scanner else None,
+        "captured_at": now,
+        "accepted_at": now,
+        "latency_ms": elapsed_ms(started) if started is not None else None,
+    })
+
+
+def _parse(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def flush_scans(events):
+    """
+    Write a batch of journaled scans in one transaction. Pairs that already
+    have a present row are skipped (and audited as duplicates), so replaying
+    a batch never double-counts attendance. An absent row, written when the
+    session ended before the drain, is upgraded to present.
+    """
+    with transaction.atomic():
+        existing = {
+            (session_id, student_id): (pk, status)
+            for pk, session_id, student_id, status in Attendance.objects.filter(
+                class_session_id__in={event["session_id"] for event in events},
+                student_id__in={event["student_id"] for event in events}
+            ).values_list('id', 'class_session_id', 'student_id', 'status')
+        }
+        # a session deleted while its scans were queued would fail the whole batch
+        sessions = set(ClassSession.objects.filter(
+            pk__in={event["session_id"] for event in events}
+        ).values_list('pk', flat=True))
+
+        rows = []
+        upgrades = []
+        logs = []
+        deltas = {}
+        for event in events:
+            session_id = event["session_id"]
+            pair = (session_id, event["student_id"])
+            row = existing.get(pair)
+            if session_id not in sessions:
+                outcome = 'invalid_session'
+            elif row is None:
+                outcome = 'created'
+            elif row[1] == 'absent':
+                outcome = 'updated'
+            else:
+                outcome = 'duplicate'
+            captured_at = _parse(event["captured_at"])
+            # one audit row per journaled scan, written with the batch
+            logs.append(AttendanceLog(
+                student_id=event["student_id"],
+                scanner_id=event["scanner_id"],
+                class_session_id=session_id if session_id in sessions else None,
+                outcome=outcome,
+                latency_ms=event.get("latency_ms"),
+                timestamp=captured_at
+            ))
+            if outcome not in ('created', 'updated'):
+                continue
+            existing[pair] = (None, 'present')
+            delta = deltas.setdefault(session_id, {'present': 0, 'absent': 0})
+            delta['present'] += 1
+            if outcome == 'updated':
+                delta['absent'] -= 1
+                upgrades.append(Attendance(id=row[0], status='present', timestamp=captured_at))
+            else:
+                rows.append(Attendance(
+                    student_id=event["student_id"],
+                    class_session_id=session_id,
+                    status='present',
+                    timestamp=captured_at
+                ))
+
+        Attendance.objects.bulk_create(rows, batch_size=500)
+        Attendance.objects.bulk_update(upgrades, ['status', 'timestamp'], batch_size=500)
+        AttendanceLog.objects.bulk_create(logs, batch_size=500)
+        for session_id, delta in deltas.items():
+            ClassSession.objects.filter(pk=session_id).bump_counts(**delta)
+    bump_courses(ClassSession.objects.filter(pk__in=deltas).values_list('course_id', 'course__lecturer_id'))
+    return len(rows) + len(upgrades)
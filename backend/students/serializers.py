@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import User, Course, ClassSession, Attendance
 from django.contrib.auth import authenticate
+from .matching import get_matcher
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -53,12 +54,28 @@ class ClassSessionSerializer(serializers.ModelSerializer):
         fields = ['id', 'course', 'start_time', 'end_time', 'is_active']
         read_only_fields = ['start_time', 'end_time', 'is_active']
 
+def validate_template(value):
+    try:
+        get_matcher().validate(value)
+    except ValueError as exc:
+        raise serializers.ValidationError(str(exc))
+    return value
+
 class FingerprintUploadSerializer(serializers.Serializer):
-    fingerprint_template = serializers.CharField(write_only=True)
+    fingerprint_template = serializers.CharField(write_only=True, validators=[validate_template])
 
 class FingerprintAttendanceSerializer(serializers.Serializer):
+    fingerprint_template = serializers.CharField(validators=[validate_template])
+    session_id = serializers.IntegerField()
+
+class ScanRecordSerializer(serializers.Serializer):
+    # malformed templates are reported per record as unknown, not rejected
     fingerprint_template = serializers.CharField()
     session_id = serializers.IntegerField()
+    captured_at = serializers.DateTimeField()
+
+class ScanBatchSerializer(serializers.Serializer):
+    records = ScanRecordSerializer(many=True, allow_empty=False, max_length=5000)
 
 class AttendanceReportSerializer(serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.username', read_only=True)
@@ -70,6 +87,15 @@ class AttendanceReportSerializer(serializers.ModelSerializer):
         model = Attendance
         fields = ['id', 'student_name', 'course_name', 'session_start', 'session_end', 'status', 'timestamp']
 
+class DashboardFilterSerializer(serializers.Serializer):
+    course_id = serializers.IntegerField(required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+class AdminDashboardFilterSerializer(DashboardFilterSerializer):
+    lecturer_id = serializers.IntegerField(required=False)
+    summary = serializers.BooleanField(required=False, default=False)
+
 class AttendanceUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attendance
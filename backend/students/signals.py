@@ -0,0 +1,79 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .models import ClassSession, Course, ScannerDevice, User
+from .permissions import invalidate_scanner
+from .registry import rosters
+from .versions import bump_courses, bump_roster
+
+
+@receiver(pre_save, sender=ScannerDevice)
+def forget_previous_scanner_key(sender, instance, **kwargs):
+    # an edited api_key must stop working straight away
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list('api_key', flat=True).first()
+        if previous != instance.api_key:
+            invalidate_scanner(previous)
+
+
+@receiver(post_save, sender=ScannerDevice)
+@receiver(post_delete, sender=ScannerDevice)
+def forget_scanner_key(sender, instance, **kwargs):
+    invalidate_scanner(instance.api_key)
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def enrollment_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # the student's courses are about to be unlinked; remember them for post_clear
+        instance._cleared_courses = list(instance.courses_enrolled.values_list('id', 'lecturer_id'))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        rosters.evict_course(instance.pk)
+        bump_courses([(instance.pk, instance.lecturer_id)])
+    elif pk_set:
+        for course_id in pk_set:
+            rosters.evict_course(course_id)
+        bump_courses(Course.objects.filter(pk__in=pk_set).values_list('id', 'lecturer_id'))
+    else:
+        cleared = getattr(instance, '_cleared_courses', [])
+        for course_id, _ in cleared:
+            rosters.evict_course(course_id)
+        bump_courses(cleared)
+
+
+@receiver(pre_save, sender=Course)
+def bump_previous_lecturer(sender, instance, **kwargs):
+    # a reassigned course leaves the old lecturer's dashboard
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list('lecturer_id', flat=True).first()
+        if previous is not None and previous != instance.lecturer_id:
+            bump_courses([(instance.pk, previous)])
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def bump_course_version(sender, instance, **kwargs):
+    # rosters carry the course name and lecturer too
+    rosters.evict_course(instance.pk)
+    bump_courses([(instance.pk, instance.lecturer_id)])
+
+
+@receiver(post_save, sender=ClassSession)
+@receiver(post_delete, sender=ClassSession)
+def session_changed(sender, instance, **kwargs):
+    # edits and deletes through the session API (a delete cascades its attendance)
+    bump_courses(Course.objects.filter(pk=instance.course_id).values_list('id', 'lecturer_id'))
+    # this worker drops the roster now, the others on their next scan
+    rosters.evict(instance.pk)
+    bump_roster(instance.course_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    # role changes and deactivation must reach token authentication straight away
+    invalidate_user(instance.pk)
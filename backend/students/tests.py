@@ -1,3 +1,163 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from students import journal
+from students.journal import ScanJournal
+from students.models import Attendance, AttendanceLog, ClassSession, Course, ScannerDevice, User
+from students.registry import rosters
+from students.scanning import flush_scans
+
+
+class WriteBehindTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.journal_path = os.path.join(self.tmp, 'scans.ndjson')
+        overrides = override_settings(
+            ATTENDANCE_WRITE_BEHIND=True,
+            ATTENDANCE_JOURNAL_PATH=self.journal_path
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # get_journal() caches the journal built from the previous settings
+        journal._journal = None
+        self.addCleanup(setattr, journal, '_journal', None)
+        rosters.clear()
+        self.addCleanup(rosters.clear)
+
+        lecturer = User.objects.create_user('lecturer', password='x', role='lecturer')
+        self.students = []
+        for i in range(3):
+            student = User(username=f'student{i}', role='student')
+            student.set_fingerprint(f'finger-{i}')
+            student.save()
+            self.students.append(student)
+        self.course = Course.objects.create(name='Maths', lecturer=lecturer)
+        self.course.students.add(*self.students)
+        self.session = ClassSession.objects.create(
+            course=self.course, start_time=timezone.now(), is_active=True, enrolled_count=3
+        )
+        self.scanner = ScannerDevice.objects.create(name='door', api_key='door-key')
+
+    def event(self, student):
+        now = timezone.now().isoformat()
+        return {
+            "session_id": self.session.id,
+            "student_id": student.id,
+            "scanner_id": self.scanner.id,
+            "captured_at": now,
+            "accepted_at": now,
+            "latency_ms": 1,
+        }
+
+    def scan(self, raw_fingerprint):
+        return APIClient().post(
+            reverse('attendance-scan'),
+            {"fingerprint_template": raw_fingerprint, "session_id": self.session.id},
+            format='json',
+            HTTP_X_SCANNER_KEY='door-key'
+        )
+
+    def test_replaying_a_batch_does_not_double_count(self):
+        events = [self.event(student) for student in self.students[:2]]
+        self.assertEqual(flush_scans(events), 2)
+        self.assertEqual(flush_scans(events), 0)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.present_count, 2)
+        self.assertEqual(Attendance.objects.filter(class_session=self.session).count(), 2)
+        self.assertEqual(
+            sorted(AttendanceLog.objects.values_list('outcome', flat=True)),
+            ['created', 'created', 'duplicate', 'duplicate']
+        )
+
+    def test_drain_resumes_after_a_failed_batch(self):
+        scans = ScanJournal(self.journal_path)
+        for student in self.students:
+            scans.append(self.event(student))
+
+        def flush_then_crash(events):
+            flush_scans(events)
+            if len(events) == 1 and events[0]["student_id"] == self.students[1].id:
+                raise RuntimeError("crashed before the checkpoint")
+
+        with self.assertRaises(RuntimeError):
+            scans.drain(flush_then_crash, batch_size=1)
+        # the second batch committed but was not checkpointed, so it is replayed
+        self.assertEqual(scans.drain(flush_scans, batch_size=1), 2)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.present_count, 3)
+        self.assertEqual(Attendance.objects.filter(class_session=self.session).count(), 3)
+        self.assertEqual(scans.read_checkpoint()["offset"], 0)
+        self.assertEqual(os.path.getsize(self.journal_path), 0)
+
+    def test_queued_scan_survives_the_session_closing(self):
+        response = self.scan('finger-0')
+        self.assertEqual(response.status_code, 202)
+
+        ClassSession.objects.filter(pk=self.session.pk).close()
+        self.assertEqual(
+            Attendance.objects.get(class_session=self.session, student=self.students[0]).status,
+            'absent'
+        )
+
+        self.assertEqual(ScanJournal(self.journal_path).drain(flush_scans), 1)
+
+        self.session.refresh_from_db()
+        self.assertEqual(
+            Attendance.objects.get(class_session=self.session, student=self.students[0]).status,
+            'present'
+        )
+        self.assertEqual((self.session.present_count, self.session.absent_count), (1, 2))
+        self.assertEqual(
+            AttendanceLog.objects.get(student=self.students[0], class_session=self.session).outcome,
+            'updated'
+        )
+
+
+class ReportPaginationTests(TestCase):
+
+    def test_walks_rows_sharing_a_timestamp(self):
+        lecturer = User.objects.create_user('lecturer', password='x', role='lecturer')
+        admin = User.objects.create_user('admin', password='x', role='admin')
+        course = Course.objects.create(name='Maths', lecturer=lecturer)
+        ended = timezone.now()
+        session = ClassSession.objects.create(course=course, start_time=ended, end_time=ended)
+        # more than DRF's offset_cutoff, all stamped with the session end like close() does
+        students = User.objects.bulk_create(
+            User(username=f'student{i}', role='student', password='!') for i in range(1500)
+        )
+        Attendance.objects.bulk_create(
+            Attendance(student=student, class_session=session, status='absent', timestamp=ended)
+            for student in students
+        )
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        url = reverse('admin-attendance-report') + '?page_size=100'
+        seen = []
+        pages = 0
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+            pages += 1
+            self.assertLessEqual(pages, 15)
+
+        self.assertEqual(len(seen), 1500)
+        self.assertEqual(seen, sorted(set(seen), reverse=True))
+
+        # and back again from the last page
+        previous = response.data['previous']
+        response = client.get(previous)
+        self.assertEqual([row['id'] for row in response.data['results']], seen[-200:-100])
 
-# Create your tests here.
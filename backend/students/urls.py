@@ -1,7 +1,8 @@
 from django.urls import path, include
-from .views import StudentRegisterView, LecturerLoginView, FingerprintAttendanceViewSet, CourseViewSet , ClassSessionViewSet, FingerprintAttendanceView , FingerprintUploadView, AdminAttendanceReportView, AdminAttendanceUpdateView, AdminUserListView,LecturerAttendanceDashboard, AdminAttendanceDashboard
+from .views import StudentRegisterView, LecturerLoginView, FingerprintAttendanceViewSet, CourseViewSet , ClassSessionViewSet, FingerprintUploadView, AdminAttendanceReportView, AdminAttendanceUpdateView, AdminUserListView,LecturerAttendanceDashboard, AdminAttendanceDashboard, EnrollmentImportView, ScanJournalStatusView, RosterStatusView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.routers import DefaultRouter
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'courses', CourseViewSet, basename='course')
@@ -14,10 +15,14 @@ urlpatterns = [
     path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('fingerprint/upload/', FingerprintUploadView.as_view(), name='fingerprint-upload'),
-    path('attendance/scan/', FingerprintAttendanceView.as_view(), name='attendance-scan'),
+    path('attendance/scan-async/', async_views.scan, name='attendance-scan-async'),
+    path('sessions/<int:session_id>/live/', async_views.session_feed, name='session-live'),
     path('admin/attendance-report/', AdminAttendanceReportView.as_view(), name='admin-attendance-report'),
     path('admin/attendance-update/<int:id>/', AdminAttendanceUpdateView.as_view(), name='admin-attendance-update'),
     path('admin/users/', AdminUserListView.as_view(), name='admin-user-list'),
+    path('admin/enrollments/import/', EnrollmentImportView.as_view(), name='admin-enrollment-import'),
+    path('admin/scan-journal/', ScanJournalStatusView.as_view(), name='admin-scan-journal'),
+    path('admin/rosters/', RosterStatusView.as_view(), name='admin-rosters'),
     path('lecturer/dashboard/', LecturerAttendanceDashboard.as_view(), name='lecturer-dashboard'),
     path('admin/dashboard/', AdminAttendanceDashboard.as_view(), name='admin-dashboard'),
     path('', include(router.urls)),
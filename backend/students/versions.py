@@ -0,0 +1,66 @@
+import time
+
+from django.core.cache import cache
+
+# attendance versions: bumped on every change a dashboard could show, kept
+# in CACHES so that every process sees them when the backend is shared
+VERSION_KEY = 'attendance-version:{}'
+
+
+def _version_key(scope):
+    return VERSION_KEY.format(scope)
+
+
+def _incr(key):
+    """Move ``key`` to a new value; returns (value replaced, new value)."""
+    previous = cache.get(key)
+    # get + set is not atomic on every backend (file cache): values are
+    # time-based so two racing writers still hand out different ones
+    value = max((previous or 0) + 1, time.time_ns())
+    cache.set(key, value, timeout=None)
+    return previous, value
+
+
+def bump_courses(pairs):
+    """
+    Record an attendance change for ``pairs`` of (course id, lecturer id).
+    Bumps each course's version, its lecturer's version and the global one.
+    """
+    scopes = set()
+    for course_id, lecturer_id in pairs:
+        scopes.add(f'course:{course_id}')
+        scopes.add(f'lecturer:{lecturer_id}')
+    if scopes:
+        scopes.add('all')
+    for scope in scopes:
+        _incr(_version_key(scope))
+
+
+def current_versions(scopes):
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+# roster generations: bumped when a course's cached scan rosters go stale
+# (session closed, enrollment changed, template registered)
+def bump_roster(course_id):
+    """Returns (generation replaced, new generation)."""
+    return _incr(_version_key(f'roster:{course_id}'))
+
+
+def roster_generation(course_id):
+    return current_versions([f'roster:{course_id}'])[0]
+
+
+async def aroster_generation(course_id):
+    key = _version_key(f'roster:{course_id}')
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        generation = await cache.aget(key)
+    return generation
@@ -1,17 +1,38 @@
+import io
+import time
+from itertools import chain
+
 from django.shortcuts import render
 from rest_framework import generics, permissions
-from .models import User, Attendance, ClassSession
+from .models import User, Attendance, ClassSession, Course
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from .serializers import UserSerializer, CourseSerializer, AdminUserSerializer, ClassSessionSerializer, FingerprintUploadSerializer, FingerprintAttendanceSerializer, AttendanceReportSerializer, AttendanceUpdateSerializer
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from .serializers import UserSerializer, CourseSerializer, AdminUserSerializer, ClassSessionSerializer, FingerprintUploadSerializer, FingerprintAttendanceSerializer, ScanBatchSerializer, AttendanceReportSerializer, AttendanceUpdateSerializer
 from .permissions import IsLecturer, IsStudent , IsValidScanner 
+from .registry import rosters, SessionRoster
+from .matching import get_matcher
+from .scanning import mark_present, queue_scan
+from .audit import scan_log
+from .live import publish_attendance, publish_ended
+from .caching import cached_dashboard
+from .routers import report_reads
+from .versions import bump_courses
+from .journal import get_journal, write_behind_enabled
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from django.utils import timezone
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, Q, Sum
 from django.contrib.auth import get_user_model
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from .serializers import LecturerLoginSerializer, LecturerMeSerializer
+from .serializers import LecturerLoginSerializer, LecturerMeSerializer, DashboardFilterSerializer, AdminDashboardFilterSerializer
+from .pagination import DashboardPagination, ReportCursorPagination, UserCursorPagination
+from .exports import CONTENT_TYPES, stream_export
+from .imports import import_enrollments
+from .archive import iter_archived_attendance
+from rest_framework.parsers import MultiPartParser
 
 
 
@@ -55,7 +76,7 @@ class CourseViewSet(viewsets.ModelViewSet):
         course = self.get_object()
         student = request.user
 
-        if student in course.students.all():
+        if course.students.filter(pk=student.pk).exists():
             return Response(
                 {"message": "Already enrolled"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -79,6 +100,27 @@ class CourseViewSet(viewsets.ModelViewSet):
         return Response(students)
 
 
+#admin bulk-enrolls students from a registrar CSV
+class EnrollmentImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        if request.user.role != 'admin':
+            return Response({"error": "Only admins allowed"}, status=403)
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "file is required"}, status=400)
+
+        try:
+            summary = import_enrollments(io.TextIOWrapper(upload.file, encoding='utf-8-sig'))
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        return Response(summary, status=200)
+
+
 class ClassSessionViewSet(viewsets.ModelViewSet):
     serializer_class = ClassSessionSerializer
     permission_classes = [IsLecturer]
@@ -118,11 +160,22 @@ class ClassSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        session = ClassSession.objects.create(
-            course=course,
-            start_time=timezone.now(),
-            is_active=True
-        )
+        try:
+            with transaction.atomic():
+                session = ClassSession.objects.create(
+                    course=course,
+                    start_time=timezone.now(),
+                    is_active=True,
+                    enrolled_count=course.students.count()
+                )
+        except IntegrityError:
+            # lost a race with another start for the same course
+            return Response(
+                {"error": "An active session already exists for this course"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rosters.load(session)
+        bump_courses([(course.id, course.lecturer_id)])
 
         return Response(
             {
@@ -149,9 +202,10 @@ class ClassSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        session.is_active = False
-        session.end_time = timezone.now()
-        session.save()
+        # marks enrolled students who never scanned as absent
+        ClassSession.objects.filter(pk=session.pk).close()
+        rosters.evict(session.id)
+        publish_ended(session.id)
 
         return Response(
             {"message": "Class session ended"},
@@ -178,10 +232,20 @@ class FingerprintUploadView(APIView):
                 status=409
             )
 
-        request.user.set_fingerprint(
+        get_matcher().enroll(
+            request.user,
             serializer.validated_data['fingerprint_template']
         )
-        request.user.save()
+        try:
+            with transaction.atomic():
+                request.user.save()
+        except IntegrityError:
+            # fingerprint_template is unique
+            return Response(
+                {"error": "Fingerprint already registered to another student"},
+                status=409
+            )
+        rosters.add_student(request.user)
 
         return Response({"message": "Fingerprint registered successfully"})
 
@@ -190,57 +254,244 @@ from rest_framework.decorators import action
 
 class FingerprintAttendanceViewSet(viewsets.ViewSet):
     permission_classes = [IsValidScanner]
+    # scanners are identified by API key; the anonymous rate would cap a busy door
+    throttle_classes = []
 
     @action(detail=False, methods=['post'])
     def scan(self, request):
+        started = time.perf_counter()
         serializer = FingerprintAttendanceSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        if not serializer.is_valid():
+            scan_log.record(request.scanner, 'invalid', started=started)
+            raise ValidationError(serializer.errors)
         fingerprint = serializer.validated_data['fingerprint_template']
         session_id = serializer.validated_data['session_id']
 
-        student = None
-        for s in User.objects.filter(role='student', fingerprint_template__isnull=False):
-            if s.check_fingerprint(fingerprint):
-                student = s
-                break
+        # active session, course and enrolled students from memory once loaded
+        roster = rosters.get(session_id)
 
-        if not student:
-            return Response({"error": "Fingerprint not recognized"}, status=404)
+        if roster is None:
+            scan_log.record(request.scanner, 'invalid_session', started=started)
+            return Response({"error": "Invalid or inactive class session"}, status=400)
 
-        session = ClassSession.objects.filter(  
-            id=session_id,
-            is_active=True
-        ).select_related('course').first()
+        # students press the same finger several times; answer repeats from memory
+        repeat = roster.repeat_of(fingerprint)
+        if repeat is not None:
+            scan_log.record(request.scanner, 'duplicate', repeat, session_id, started=started)
+            return Response({"error": "Attendance already marked"}, status=409)
 
-        if not session:
-            return Response({"error": "Invalid or inactive class session"}, status=400)
+        # match against the session's enrolled students only
+        match = roster.match(fingerprint)
 
-        if not session.course.students.filter(id=student.id).exists():
-            return Response({"error": "Student not enrolled"}, status=403)
+        if not match:
+            # only a miss pays for the population-wide indexed lookup
+            if get_matcher().lookup(fingerprint):
+                scan_log.record(request.scanner, 'not_enrolled', session_id=session_id, started=started)
+                return Response({"error": "Student not enrolled"}, status=403)
+            scan_log.record(request.scanner, 'unknown', session_id=session_id, started=started)
+            return Response({"error": "Fingerprint not recognized"}, status=404)
+
+        student_id, username = match
 
-        if Attendance.objects.filter(student=student, class_session=session).exists():
+        if student_id in roster.marked:
+            roster.mark(student_id, fingerprint)
+            scan_log.record(request.scanner, 'duplicate', student_id, session_id, started=started)
             return Response({"error": "Attendance already marked"}, status=409)
 
-        Attendance.objects.create(
-            student=student,
-            class_session=session,
-            status='present',
-            timestamp=timezone.now()
-        )
+        if write_behind_enabled():
+            # durable once journaled; drain_journal writes it (and its audit row) to the database
+            queue_scan(session_id, student_id, request.scanner, started=started)
+            roster.mark(student_id, fingerprint)
+            return Response({"message": "Attendance queued",
+                             "student": username,
+                             "course": roster.course_name}, status=202)
+
+        now = timezone.now()
+        try:
+            created = mark_present(session_id, student_id, now)
+        except IntegrityError:
+            # the session was deleted after the roster was loaded
+            rosters.evict(session_id)
+            scan_log.record(request.scanner, 'invalid_session', started=started)
+            return Response({"error": "Invalid or inactive class session"}, status=400)
+        roster.mark(student_id, fingerprint)
+        if not created:
+            scan_log.record(request.scanner, 'duplicate', student_id, session_id, started=started)
+            return Response({"error": "Attendance already marked"}, status=409)
 
+        scan_log.record(request.scanner, 'created', student_id, session_id, started=started)
+        bump_courses([(roster.course_id, roster.lecturer_id)])
+        publish_attendance(session_id, username, 'present', now, present=1)
         return Response({"message": "Attendance marked successfully",
-                         "student": student.username,
-                         "course": session.course.name}, status=201)
+                         "student": username,
+                         "course": roster.course_name}, status=201)
+
+    #replay scans buffered offline by a scanner
+    @action(detail=False, methods=['post'], url_path='scan-batch')
+    def scan_batch(self, request):
+        started = time.perf_counter()
+        serializer = ScanBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        records = serializer.validated_data['records']
+        now = timezone.now()
+
+        sessions = ClassSession.objects.filter(
+            id__in={r['session_id'] for r in records}
+        ).select_related('course').in_bulk()
+
+        session_rosters = {}
+        for session in sessions.values():
+            roster = rosters.get(session.id) if session.is_active else None
+            # closed sessions get a throwaway roster, active ones use the registry
+            session_rosters[session.id] = roster or SessionRoster.build(session)
+
+        results = [None] * len(records)
+        matched = {}
+        misses = {}
+        for i, record in enumerate(records):
+            session = sessions.get(record['session_id'])
+            captured_at = record['captured_at']
+            if (
+                not session
+                or captured_at < session.start_time
+                or captured_at > (session.end_time or now)
+            ):
+                results[i] = {"status": "invalid_session"}
+                continue
+
+            match = session_rosters[session.id].match(record['fingerprint_template'])
+            if match:
+                matched[i] = (session.id, match)
+            else:
+                misses[i] = record['fingerprint_template']
+
+        known = get_matcher().lookup_many(set(misses.values()))
+        for i, fingerprint in misses.items():
+            results[i] = {"status": "not_enrolled" if fingerprint in known else "unknown"}
+
+        existing = {
+            (session_id, student_id): (pk, status)
+            for pk, session_id, student_id, status in Attendance.objects.filter(
+                class_session_id__in={sid for sid, _ in matched.values()},
+                student_id__in={match[0] for _, match in matched.values()}
+            ).values_list('id', 'class_session_id', 'student_id', 'status')
+        }
+
+        # record index -> row to insert
+        new_rows = {}
+        # absentees recorded when the session ended, now proven present
+        upgrades = {}
+        for i, (session_id, (student_id, username)) in matched.items():
+            result = {"status": "duplicate", "student": username}
+            row = existing.get((session_id, student_id))
+            if row is None:
+                result["status"] = "created"
+                new_rows[i] = Attendance(
+                    student_id=student_id,
+                    class_session_id=session_id,
+                    status='present',
+                    timestamp=records[i]['captured_at']
+                )
+            elif row[1] == 'absent':
+                result["status"] = "updated"
+                upgrades[i] = Attendance(
+                    id=row[0],
+                    class_session_id=session_id,
+                    status='present',
+                    timestamp=records[i]['captured_at']
+                )
+            existing[(session_id, student_id)] = (None, 'present')
+            results[i] = result
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    Attendance.objects.bulk_create(new_rows.values(), batch_size=500)
+            except IntegrityError:
+                # a live scan landed since the duplicate check; find out which
+                for i, row in list(new_rows.items()):
+                    row.pk = None
+                    try:
+                        with transaction.atomic():
+                            row.save(force_insert=True)
+                    except IntegrityError:
+                        results[i]["status"] = "duplicate"
+                        del new_rows[i]
+            Attendance.objects.bulk_update(upgrades.values(), ['status', 'timestamp'], batch_size=500)
+
+            deltas = {}
+            live_events = []
+            for i, row in new_rows.items():
+                deltas.setdefault(row.class_session_id, {'present': 0, 'absent': 0})['present'] += 1
+                live_events.append((row.class_session_id, results[i]["student"], row.timestamp, {'present': 1}))
+            for i, row in upgrades.items():
+                delta = deltas.setdefault(row.class_session_id, {'present': 0, 'absent': 0})
+                delta['present'] += 1
+                delta['absent'] -= 1
+                live_events.append((row.class_session_id, results[i]["student"], row.timestamp, {'present': 1, 'absent': -1}))
+            for session_id, delta in deltas.items():
+                ClassSession.objects.filter(pk=session_id).bump_counts(**delta)
+
+        bump_courses({
+            (sessions[session_id].course_id, sessions[session_id].course.lecturer_id)
+            for session_id in deltas
+        })
+        # every matched student now has a row, so live repeats can stop at the registry
+        for session_id, (student_id, _) in matched.values():
+            session_rosters[session_id].mark(student_id)
+        for session_id, username, captured_at, delta in live_events:
+            publish_attendance(session_id, username, 'present', captured_at, **delta)
+
+        summary = {}
+        for i, result in enumerate(results):
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+            session_id, match = matched.get(i, (records[i]['session_id'], None))
+            scan_log.record(
+                request.scanner, result["status"],
+                student_id=match[0] if match else None,
+                session_id=session_id if session_id in sessions else None,
+                started=started,
+                timestamp=records[i]['captured_at']
+            )
 
+        return Response({"summary": summary, "results": results}, status=200)
 
-#only registered scanners can mark attendance 
-class FingerprintAttendanceView(APIView):
-    permission_classes = [IsValidScanner]
+
+class ScanJournalStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'admin':
+            return Response({"error": "Only admins allowed"}, status=403)
+        return Response({"enabled": write_behind_enabled(), **get_journal().stats()})
+
+
+class RosterStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # checks the registry of whichever worker serves this request
+        if request.user.role != 'admin':
+            return Response({"error": "Only admins allowed"}, status=403)
+        return Response(rosters.verify())
+
+
+# report column -> joined lookup, matching AttendanceReportSerializer
+REPORT_EXPORT_FIELDS = {
+    'id': 'id',
+    'student_name': 'student__username',
+    'course_name': 'class_session__course__name',
+    'session_start': 'class_session__start_time',
+    'session_end': 'class_session__end_time',
+    'status': 'status',
+    'timestamp': 'timestamp',
+}
 
 
 class AdminAttendanceReportView(generics.ListAPIView):
     serializer_class = AttendanceReportSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ReportCursorPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -253,7 +504,35 @@ class AdminAttendanceReportView(generics.ListAPIView):
             queryset = queryset.filter(class_session__course__id=course_id)
         if student_id:
             queryset = queryset.filter(student__id=student_id)
-        return queryset.order_by('-timestamp')
+        return queryset.select_related('student', 'class_session__course').order_by('-timestamp', '-id')
+
+    def list(self, request, *args, **kwargs):
+        export = request.query_params.get('export')
+        include_archived = request.query_params.get('include_archived') in ('1', 'true')
+        if not export:
+            if include_archived:
+                # archived terms live in files, so they cannot join the cursor pages
+                return Response({"error": "include_archived requires export=csv or ndjson"}, status=400)
+            with report_reads():
+                return super().list(request, *args, **kwargs)
+        if export not in CONTENT_TYPES:
+            return Response({"error": "export must be csv or ndjson"}, status=400)
+
+        # the stream is read after the view returns, so pin the reports connection now
+        with report_reads():
+            queryset = self.get_queryset().using(router.db_for_read(Attendance))
+        # one joined query read in chunks, so memory stays flat for any size
+        rows = queryset.values_list(*REPORT_EXPORT_FIELDS.values()).iterator(chunk_size=2000)
+        if include_archived and request.user.role == 'admin':
+            terms = request.query_params.get('terms')
+            # archived rows are older than anything still in the table
+            rows = chain(rows, iter_archived_attendance(
+                REPORT_EXPORT_FIELDS.values(),
+                course_id=request.query_params.get('course_id'),
+                student_id=request.query_params.get('student_id'),
+                terms=terms.split(',') if terms else None
+            ))
+        return stream_export(rows, list(REPORT_EXPORT_FIELDS), export, 'attendance-report')
 
 
 class AdminAttendanceUpdateView(generics.UpdateAPIView):
@@ -267,11 +546,30 @@ class AdminAttendanceUpdateView(generics.UpdateAPIView):
             return Attendance.objects.none()
         return super().get_queryset()
 
+    def perform_update(self, serializer):
+        previous = serializer.instance.status
+        with transaction.atomic():
+            attendance = serializer.save()
+            if attendance.status != previous:
+                ClassSession.objects.filter(pk=attendance.class_session_id).bump_counts(
+                    **{previous: -1, attendance.status: 1}
+                )
+        if attendance.status != previous:
+            bump_courses(ClassSession.objects.filter(
+                pk=attendance.class_session_id
+            ).values_list('course_id', 'course__lecturer_id'))
+            publish_attendance(
+                attendance.class_session_id, attendance.student.username,
+                attendance.status, attendance.timestamp,
+                **{previous: -1, attendance.status: 1}
+            )
+
 
 
 class AdminUserListView(generics.ListAPIView):
     serializer_class = AdminUserSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = UserCursorPagination
 
     def get_queryset(self):
         if self.request.user.role != 'admin':
@@ -283,6 +581,21 @@ class AdminUserListView(generics.ListAPIView):
         return qs
 
 
+def session_period(filters, prefix=''):
+    period = Q()
+    if filters.get('start_date'):
+        period &= Q(**{prefix + 'start_time__date__gte': filters['start_date']})
+    if filters.get('end_date'):
+        period &= Q(**{prefix + 'start_time__date__lte': filters['end_date']})
+    return period
+
+
+def filter_sessions(sessions, filters):
+    if filters.get('course_id'):
+        sessions = sessions.filter(course_id=filters['course_id'])
+    return sessions.filter(session_period(filters))
+
+
 class LecturerAttendanceDashboard(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -290,20 +603,43 @@ class LecturerAttendanceDashboard(APIView):
         if request.user.role != 'lecturer':
             return Response({"error": "Only lecturers allowed"}, status=403)
 
+        filters = DashboardFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        filters = filters.validated_data
+
+        if filters.get('course_id'):
+            scopes = [f"course:{filters['course_id']}"]
+        else:
+            scopes = [f"lecturer:{request.user.id}"]
+        with report_reads():
+            return cached_dashboard(request, scopes, lambda: self.build(request, filters))
+
+    def build(self, request, filters):
+        courses = Course.objects.filter(lecturer=request.user).order_by('id')
+        if filters.get('course_id'):
+            courses = courses.filter(id=filters['course_id'])
+
+        sessions = filter_sessions(
+            ClassSession.objects.filter(course__lecturer=request.user), filters
+        ).order_by('-start_time')
+
+        sessions_by_course = {}
+        for session in sessions:
+            sessions_by_course.setdefault(session.course_id, []).append(session)
+
         dashboard = []
 
-        for course in request.user.courses_taught.all():
+        for course in courses:
             sessions_data = []
-            for session in course.classsession_set.all().order_by('-start_time'):
-                attendances = session.attendance_set.all()
+            for session in sessions_by_course.get(course.id, []):
                 sessions_data.append({
                     "session_id": session.id,
                     "start_time": session.start_time,
                     "end_time": session.end_time,
                     "is_active": session.is_active,
-                    "total_students": course.students.count(),
-                    "present_students": attendances.filter(status='present').count(),
-                    "absent_students": attendances.filter(status='absent').count()
+                    "total_students": session.enrolled_count,
+                    "present_students": session.present_count,
+                    "absent_students": session.absent_count
                 })
             dashboard.append({
                 "course_id": course.id,
@@ -313,34 +649,82 @@ class LecturerAttendanceDashboard(APIView):
 
         return Response(dashboard)
 
-class AdminAttendanceDashboard(APIView):
+class AdminAttendanceDashboard(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = DashboardPagination
 
-    def get(self, request):
+    def list(self, request):
         if request.user.role != 'admin':
             return Response({"error": "Only admins allowed"}, status=403)
 
+        filters = AdminDashboardFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        filters = filters.validated_data
+
+        if filters.get('course_id'):
+            scopes = [f"course:{filters['course_id']}"]
+        elif filters.get('lecturer_id'):
+            scopes = [f"lecturer:{filters['lecturer_id']}"]
+        else:
+            scopes = ['all']
+        with report_reads():
+            return cached_dashboard(request, scopes, lambda: self.build(request, filters))
+
+    def build(self, request, filters):
+        courses = Course.objects.order_by('id')
+        if filters.get('course_id'):
+            courses = courses.filter(id=filters['course_id'])
+        if filters.get('lecturer_id'):
+            courses = courses.filter(lecturer_id=filters['lecturer_id'])
+
+        if filters.get('summary'):
+            # per-course totals only, grouped in the database
+            period = session_period(filters, prefix='classsession__')
+            courses = courses.annotate(
+                session_count=Count('classsession', filter=period),
+                present=Sum('classsession__present_count', filter=period, default=0),
+                absent=Sum('classsession__absent_count', filter=period, default=0),
+            )
+            page = self.paginate_queryset(courses)
+            return self.get_paginated_response([
+                {
+                    "course_id": course.id,
+                    "course_name": course.name,
+                    "sessions": course.session_count,
+                    "present": course.present,
+                    "absent": course.absent
+                }
+                for course in page
+            ])
+
+        page = self.paginate_queryset(courses)
+        sessions = filter_sessions(
+            ClassSession.objects.filter(course__in=[course.id for course in page]), filters
+        ).order_by('-start_time')
+
+        sessions_by_course = {}
+        for session in sessions:
+            sessions_by_course.setdefault(session.course_id, []).append(session)
+
         data = []
-        courses = Course.objects.all()
-        for course in courses:
+        for course in page:
             sessions = []
-            for session in course.classsession_set.all().order_by('-start_time'):
-                attendances = session.attendance_set.all()
+            for session in sessions_by_course.get(course.id, []):
                 sessions.append({
                     "session_id": session.id,
                     "course_name": course.name,
                     "start_time": session.start_time,
                     "end_time": session.end_time,
                     "is_active": session.is_active,
-                    "present": attendances.filter(status='present').count(),
-                    "absent": attendances.filter(status='absent').count()
+                    "present": session.present_count,
+                    "absent": session.absent_count
                 })
             data.append({
                 "course_id": course.id,
                 "course_name": course.name,
                 "sessions": sessions
             })
-        return Response(data)
+        return self.get_paginated_response(data)
 
 
 class LecturerLoginView(APIView):